@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Runs DelsysDataHandler in its own process so socket reads and filtering do not
+share a GIL with the web app. Processed frames are written straight into a
+shared-memory ring buffer that the parent process attaches to without copying.
+"""
+import multiprocessing
+import time
+import numpy as np
+from delsys_handler import DelsysDataHandler
+from ring_buffer import SharedFrameRingBuffer
+from sample_clock import SampleClock
+
+
+def _acquisition_main(handler_kwargs, ring_name, ring_capacity, stop_event, started_event,
+                      streaming_flag, sampling_rate, clock_state, write_condition):
+    """Child process entry point: stream into the shared ring until told to stop."""
+    ring = SharedFrameRingBuffer.attach(ring_name, ring_capacity, handler_kwargs['num_sensors'], write_condition)
+    sample_clock = SampleClock(handler_kwargs['sampling_rate'], state=np.frombuffer(clock_state, dtype=np.float64))
+    handler = DelsysDataHandler(output_ring=ring, sample_clock=sample_clock, **handler_kwargs)
+    try:
+        if handler.start_streaming():
+            sampling_rate.value = handler.SAMPLING_RATE
+            streaming_flag.value = 1
+        started_event.set()
+        while handler.streaming and not stop_event.wait(0.1):
+            # Mirror the thread's state so the parent notices a dropped connection
+            if not any(thread.is_alive() for thread in handler.threads):
+                break
+    finally:
+        streaming_flag.value = 0
+        ring.wake()
+        started_event.set()
+        # The shared ring and clock belong to the parent, which may still be saving a trial from them
+        handler.stop_streaming(clear_buffers=False)
+        handler.output_ring = None
+        ring.close()
+
+
+class AcquisitionProcess:
+    """
+    Process-backed stand-in for DelsysDataHandler.
+    Exposes the attributes the recorder and live view use (streaming,
+    output_ring, sample_clock, muscle_labels, SAMPLING_RATE, NUM_SENSORS) while the handler
+    itself runs in a child process.
+    """
+
+    def __init__(self, host_ip='localhost', num_sensors=16, sampling_rate=2000.0, ring_seconds=10.0, **handler_kwargs):
+        """
+        Args:
+            host_ip, num_sensors, sampling_rate: Passed to DelsysDataHandler.
+            ring_seconds (float): Length of the shared output ring.
+            handler_kwargs: Any other DelsysDataHandler keyword arguments.
+        """
+        self.HOST_IP = host_ip
+        self.NUM_SENSORS = num_sensors
+        self.handler_kwargs = dict(handler_kwargs, host_ip=host_ip, num_sensors=num_sensors,
+                                   sampling_rate=sampling_rate)
+        self.muscle_labels = list(DelsysDataHandler.DEFAULT_MUSCLE_LABELS)
+        self.ring_capacity = int(sampling_rate * ring_seconds)
+
+        # Spawn rather than fork so the child does not inherit the parent's threads
+        self.context = multiprocessing.get_context('spawn')
+        self.stop_event = self.context.Event()
+        self.started_event = self.context.Event()
+        self.streaming_flag = self.context.Value('b', 0)
+        self.sampling_rate = self.context.Value('d', sampling_rate)
+        # Sample clock state written by the child, read here for timestamps and gaps
+        self.clock_state = self.context.RawArray('d', SampleClock.STATE_SIZE)
+        self.sample_clock = SampleClock(sampling_rate, state=np.frombuffer(self.clock_state, dtype=np.float64))
+        # Notified by the child after every ring write, so readers here need not poll
+        self.write_condition = self.context.Condition()
+        self.process = None
+        self.output_ring = None
+
+    @property
+    def streaming(self):
+        """True while the child process is streaming."""
+        return bool(self.streaming_flag.value)
+
+    def is_alive(self):
+        """True while the child process is running and streaming."""
+        return self.streaming and self.process is not None and self.process.is_alive()
+
+    @property
+    def SAMPLING_RATE(self):
+        """Actual sampling rate reported by the child process."""
+        return self.sampling_rate.value
+
+    def start_streaming(self, timeout=15.0):
+        """Start the acquisition process and wait until it is streaming."""
+        print("🚀 Starting acquisition process...")
+        self.output_ring = SharedFrameRingBuffer.create(self.ring_capacity, self.NUM_SENSORS, self.write_condition)
+        self.stop_event.clear()
+        self.started_event.clear()
+        self.process = self.context.Process(
+            target=_acquisition_main,
+            args=(self.handler_kwargs, self.output_ring.name, self.ring_capacity, self.stop_event,
+                  self.started_event, self.streaming_flag, self.sampling_rate, self.clock_state,
+                  self.write_condition),
+            daemon=True)
+        self.process.start()
+        if not self.started_event.wait(timeout) or not self.streaming:
+            print("❌ Acquisition process failed to start streaming")
+            self.stop_streaming()
+            return False
+        print(f"✅ Acquisition process {self.process.pid} streaming")
+        return True
+
+    def stop_streaming(self):
+        """Stop the acquisition process and release the shared memory."""
+        print("🛑 Stopping acquisition process...")
+        # Readers here see the stop first, then the child stops writing before the ring is released
+        self.streaming_flag.value = 0
+        self.stop_event.set()
+        if self.process is not None:
+            self.process.join(timeout=5.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1.0)
+            self.process = None
+        if self.output_ring is not None:
+            self.output_ring.close()
+            self.output_ring = None
+
+
+# Example usage if run directly (for testing the acquisition process)
+if __name__ == "__main__":
+    acquisition = AcquisitionProcess()
+    if acquisition.start_streaming():
+        reader = acquisition.output_ring.reader()
+        try:
+            while acquisition.streaming:
+                frames, start = reader.read(timeout=1.0)
+                print(f"Samples {start}-{start + len(frames)}: {len(frames)} frames from shared memory")
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            acquisition.stop_streaming()
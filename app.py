@@ -1,20 +1,29 @@
 # app.py
+import time
+# Reference point for the time-to-first-request measurement
+APP_START_TIME = time.perf_counter()
 import os
+import sys
+import json
+import base64
+import datetime
+import threading
+import queue
 import numpy as np
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Blueprint, current_app, render_template, jsonify, request, Response, stream_with_context
 from delsys_handler import DelsysDataHandler
-import threading
-import time
-import scipy.io
-import collections
-import datetime
-import queue  # Required for queue.Empty exception
-import tkinter as tk
-from tkinter import filedialog
-import sys
+from acquisition_process import AcquisitionProcess
+from recorder import StreamingRecorder
+from recording_container import ContainerRecorder
+from triggers import EnvelopeTrigger, MessageListener, TRIAL_START, TRIAL_END, START_RECORDING, STOP_RECORDING
+from live_view import (pack_live_frame, live_window, decimate_minmax, LiveSnapshotCache, LIVE_FRAME_MIMETYPE,
+                       LIVE_FLAG_RESYNC, LIVE_FLAG_DECIMATED)
 
 def select_save_directory():
     """Open a dialog to select the save directory before starting the app."""
+    # tkinter is only needed (and only available) on a desktop
+    import tkinter as tk
+    from tkinter import filedialog
     root = tk.Tk()
     root.withdraw()  # Hide the main window
     root.attributes('-topmost', True)  # Make the dialog topmost
@@ -32,300 +41,1003 @@ def select_save_directory():
         
     return save_dir
 
-app = Flask(__name__)
+bp = Blueprint('emg', __name__)
 
 # --- Configuration ---
-HOST_IP = 'localhost'
-NUM_SENSORS = 16
-SAMPLING_RATE = 2000.0
-
-# Let user select save directory before starting
-SAVE_DIRECTORY = select_save_directory()
-METADATA_DIRECTORY = os.path.join(SAVE_DIRECTORY, "metadata")
-STRUCTS_DIRECTORY = os.path.join(SAVE_DIRECTORY, "structs")
-os.makedirs(SAVE_DIRECTORY, exist_ok=True)
-os.makedirs(METADATA_DIRECTORY, exist_ok=True)
-os.makedirs(STRUCTS_DIRECTORY, exist_ok=True)
+# Defaults, overridden in order by a JSON config file (--config or EMG_CONFIG),
+# EMG_<KEY> environment variables and command-line arguments; see load_config().
+DEFAULT_CONFIG = {
+    'host_ip': 'localhost',
+    'num_sensors': 16,
+    'sampling_rate': 2000.0,
+    # Run acquisition and filtering in a separate process and read samples through shared memory
+    'acquisition_process': False,
+    # Keep the device connected and streaming between trials; start/stop only gate the recorder
+    'persistent_connection': True,
+    # None: ask with a dialog on a desktop, otherwise ./recordings
+    'save_directory': None,
+    # Seconds of history before Record is pressed that are prepended to every trial
+    'pretrigger_seconds': 2.0,
+    'recording_format': 'bin',
+    # 'manual': the Record button; 'envelope': EMG envelope thresholds; 'messages': MessageHandler
+    # START_RECORDING/STOP_RECORDING/TRIAL_START messages. Automatic modes need persistent_connection.
+    'trigger_mode': 'manual',
+    # Envelope levels in volts, one value or a per-channel list (JSON config); null ignores a channel
+    'trigger_on_threshold': 0.0002,
+    'trigger_off_threshold': 0.0001,
+    'trigger_min_channels': 1,
+    # Minimum seconds between two envelope triggers
+    'trigger_hold_off': 0.5,
+    # UDP port the MessageHandler sends our messages to, and optionally its RPC address
+    # ('host:port') to register this module with
+    'message_port': 10000,
+    'message_handler': '',
+    'message_module_id': 20,
+    'container_encoding': 'float32',
+    'bind_host': '0.0.0.0',
+    'port': 5000,
+    # 'auto': waitress if installed, else the threaded werkzeug server;
+    # 'development': Flask's app.run
+    'server': 'auto',
+    # Request threads of the production server; each open /live_stream holds one
+    'threads': 32,
+}
+
+HOST_IP = DEFAULT_CONFIG['host_ip']
+NUM_SENSORS = DEFAULT_CONFIG['num_sensors']
+SAMPLING_RATE = DEFAULT_CONFIG['sampling_rate']
+USE_ACQUISITION_PROCESS = DEFAULT_CONFIG['acquisition_process']
+PERSISTENT_CONNECTION = DEFAULT_CONFIG['persistent_connection']
+
+SAVE_DIRECTORY = None
+METADATA_DIRECTORY = None
+STRUCTS_DIRECTORY = None
+
+def parse_config_value(value, default):
+    """Convert an environment variable string to the type of its default."""
+    if isinstance(default, bool):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+def load_config(overrides=None, config_file=None):
+    """Merge the defaults, a JSON config file, EMG_* environment variables and overrides."""
+    config = dict(DEFAULT_CONFIG)
+    config_file = config_file or os.environ.get('EMG_CONFIG')
+    if config_file:
+        with open(config_file) as f:
+            config.update(json.load(f))
+    for key, default in DEFAULT_CONFIG.items():
+        value = os.environ.get(f'EMG_{key.upper()}')
+        if value is not None:
+            config[key] = parse_config_value(value, default)
+    config.update({key: value for key, value in (overrides or {}).items() if value is not None})
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown configuration keys: {', '.join(sorted(unknown))}")
+    return config
+
+def has_display():
+    """True if a directory dialog can be shown."""
+    return sys.platform in ('win32', 'darwin') or bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+def preload_modules():
+    """Import the slow scientific modules in the background so the first trial starts fast."""
+    import scipy.signal
+    import scipy.io
+
+def create_app(overrides=None, config_file=None):
+    """
+    Build the Flask app. Nothing slow happens at import time: configuration is
+    read here, the save directory dialog is only shown on a desktop when no
+    directory is configured, and SciPy is imported in the background after the
+    first request. Recording state is module-level, so create one app per process.
+    """
+    global HOST_IP, NUM_SENSORS, SAMPLING_RATE, USE_ACQUISITION_PROCESS, PERSISTENT_CONNECTION
+    global RECORDING_FORMAT, CONTAINER_ENCODING, PRETRIGGER_SECONDS
+    global SAVE_DIRECTORY, METADATA_DIRECTORY, STRUCTS_DIRECTORY, live_stream_slots
+    config = load_config(overrides, config_file)
+    HOST_IP = config['host_ip']
+    NUM_SENSORS = int(config['num_sensors'])
+    SAMPLING_RATE = float(config['sampling_rate'])
+    USE_ACQUISITION_PROCESS = bool(config['acquisition_process'])
+    PERSISTENT_CONNECTION = bool(config['persistent_connection'])
+    RECORDING_FORMAT = config['recording_format']
+    CONTAINER_ENCODING = config['container_encoding']
+    PRETRIGGER_SECONDS = max(0.0, float(config['pretrigger_seconds']))
+    live_stream_slots = threading.BoundedSemaphore(max(1, int(config['threads']) // 2))
+
+    save_directory = config['save_directory']
+    if not save_directory:
+        save_directory = select_save_directory() if has_display() else './recordings'
+    SAVE_DIRECTORY = save_directory
+    METADATA_DIRECTORY = os.path.join(SAVE_DIRECTORY, "metadata")
+    STRUCTS_DIRECTORY = os.path.join(SAVE_DIRECTORY, "structs")
+    os.makedirs(SAVE_DIRECTORY, exist_ok=True)
+    os.makedirs(METADATA_DIRECTORY, exist_ok=True)
+    os.makedirs(STRUCTS_DIRECTORY, exist_ok=True)
+
+    if config['trigger_mode'] not in TRIGGER_MODES:
+        raise ValueError(f"Unknown trigger mode: {config['trigger_mode']}")
+    if config['trigger_mode'] != 'manual' and not PERSISTENT_CONNECTION:
+        raise ValueError("Automatic triggers need persistent_connection")
+    start_triggers(config)
+
+    app = Flask(__name__)
+    app.config['EMG'] = dict(config, save_directory=SAVE_DIRECTORY)
+    app.config['STARTUP_SECONDS'] = None
+    app.register_blueprint(bp)
+
+    @app.before_request
+    def note_first_request():
+        if app.config['STARTUP_SECONDS'] is None:
+            app.config['STARTUP_SECONDS'] = time.perf_counter() - APP_START_TIME
+            print(f"⏱️  First request {app.config['STARTUP_SECONDS'] * 1e3:.0f} ms after start")
+            threading.Thread(target=preload_modules, daemon=True).start()
+
+    return app
 
 # --- Global State ---
+# With PERSISTENT_CONNECTION the handler stays connected for the whole session;
+# otherwise each trial connects a new one and the writer disconnects it
 handler = None
-recording_data_buffer = [[] for _ in range(NUM_SENSORS + 1)]
+# Set by POST /disconnect: nothing reconnects to the device until POST /connect
+operator_disconnected = False
+# Set while a trigger thread connects without holding recording_lock
+device_connecting = False
 recording_lock = threading.Lock()
 is_recording = False
-start_time = None
+recorder = None
+recording_thread = None
+
+# --- Background Writer ---
+# Stopped trials are finalized off the request thread; job state is polled via /recording_status
+finalize_queue = queue.Queue()
+finalize_jobs = {}
+finalize_thread = None
+finalize_job_counter = 0
+FINALIZE_JOBS_KEPT = 20
+# Cleared while a stopped trial's handler is still disconnecting from the device
+handler_released = threading.Event()
+handler_released.set()
 
 # --- Recording Session Info ---
 recording_session_start_time = None
 trial_counter = 1
+# Guards trial_counter on its own, so the background writer can give back the number
+# of an empty trial without taking recording_lock (which disconnect_device holds while
+# it waits for the writer)
+trial_counter_lock = threading.Lock()
+# Seconds between forced flushes of the trial file to disk
+RECORDING_FLUSH_INTERVAL = 2.0
+# 'bin': raw float64 .bin + metadata .mat (read by misc/readDAQData.m)
+# 'container': compressed, chunked .emgc file with embedded metadata (see recording_container.py)
+RECORDING_FORMAT = DEFAULT_CONFIG['recording_format']
+CONTAINER_ENCODING = DEFAULT_CONFIG['container_encoding']
+# Pre-trigger history is read from the handler's output ring, which is sized to hold it
+PRETRIGGER_SECONDS = DEFAULT_CONFIG['pretrigger_seconds']
 
-# --- Live Data Buffering for GUI ---
+# --- Live Data for GUI ---
+# The live view reads the newest samples straight from the handler's output ring
 LIVE_BUFFER_CHUNKS = 10
-live_data_buffers = [collections.deque(maxlen=LIVE_BUFFER_CHUNKS) for _ in range(NUM_SENSORS)]
-live_data_lock = threading.Lock()
+LIVE_SAMPLES_PER_CHUNK = 75
+# Serialized live responses, shared by all viewers and rebuilt once per producer update
+live_snapshots = LiveSnapshotCache()
+# Counts handlers installed this session; live cache keys carry it so a snapshot of an
+# earlier connection is never served for a new one (a new ring can reuse an old id())
+live_generation = 0
+# Seconds between keep-alive comments on idle /live_stream connections
+LIVE_STREAM_KEEPALIVE = 15.0
+# Open /live_stream connections are limited so they cannot take every request thread;
+# clients turned away fall back to polling. Sized from the 'threads' setting in create_app.
+live_stream_slots = threading.BoundedSemaphore(DEFAULT_CONFIG['threads'] // 2)
+
+# --- Automatic Triggers ---
+TRIGGER_MODES = ('manual', 'envelope', 'messages')
+TRIGGER_MODE = DEFAULT_CONFIG['trigger_mode']
+trigger_thread = None
+trigger_listener = None
+triggers_stopping = threading.Event()
+# Sample index up to which the envelope trigger has evaluated the stream. Trials it started
+# are written only up to here, so their stop sample is known before it reaches the file.
+trigger_evaluated_cursor = None
 
 # --- Helper Functions ---
-def generate_timestamps(num_samples):
-    """Generate timestamps based on start_time and sampling rate."""
-    if start_time is None:
-        return np.zeros(num_samples)
-    timestamps = start_time + np.arange(num_samples) / SAMPLING_RATE
-    return timestamps
-
-def recording_worker():
-    """Worker thread to read data from the handler's queue while recording."""
-    global is_recording, recording_data_buffer, start_time, live_data_buffers
-    local_sample_count = 0
+def output_ring_seconds():
+    """Length of the handler's output ring: 10 s, or longer to hold the pre-trigger history."""
+    # Readers treat the oldest eighth of the ring as overwritten, plus a second of margin
+    return max(10.0, PRETRIGGER_SECONDS * 8 / 7 + 1.0)
+
+def create_handler():
+    """Create the data handler, in-process or in a separate acquisition process."""
+    if USE_ACQUISITION_PROCESS:
+        return AcquisitionProcess(host_ip=HOST_IP, num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE,
+                                  ring_seconds=output_ring_seconds(), output_format='block')
+    return DelsysDataHandler(host_ip=HOST_IP, num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE,
+                             output_ring_seconds=output_ring_seconds(), output_format='block')
+
+def trial_filenames(trial_number):
+    """Return the data and metadata filenames of a trial in the current session."""
+    timestamp_str = recording_session_start_time.strftime("%Y%m%d_%H%M%S")
+    trial_str = f"{trial_number:04d}"
+    extension = 'emgc' if RECORDING_FORMAT == 'container' else 'bin'
+    bin_filename = os.path.join(SAVE_DIRECTORY, f"{timestamp_str}_Trl{trial_str}.{extension}")
+    meta_filename = os.path.join(METADATA_DIRECTORY, f"{timestamp_str}_METADATATrl{trial_str}.mat")
+    return bin_filename, meta_filename
+
+def trial_metadata(trial_number, muscle_labels, gap_report=None, pretrigger_samples=0):
+    """Build the trial metadata dictionary."""
+    meta_data = {}
+    meta_data['emg_ch_number'] = np.array(range(1, NUM_SENSORS + 1))
+    meta_data['fs'] = float(SAMPLING_RATE)
+    meta_data['total_analog_in_ch'] = float(NUM_SENSORS)
+    meta_data['musc_labels'] = muscle_labels
+    meta_data['session_date'] = recording_session_start_time.strftime("%Y-%m-%d")
+    meta_data['session_time'] = recording_session_start_time.strftime("%H:%M:%S")
+    meta_data['trial_number'] = int(trial_number)
+    # 'interleaved': one [timestamp, ch1..chN] float64 row per sample in the .bin file
+    meta_data['data_layout'] = 'chunked' if RECORDING_FORMAT == 'container' else 'interleaved'
+    # Samples recorded before Record was pressed; the trial proper starts at this sample
+    meta_data['pretrigger_samples'] = int(pretrigger_samples)
+    if gap_report is not None:
+        meta_data['gap_report'] = gap_report
+    return meta_data
+
+def save_metadata(meta_filename, trial_number, muscle_labels, gap_report=None, pretrigger_samples=0):
+    """Write the trial metadata .mat file."""
+    import scipy.io
+    meta_data = trial_metadata(trial_number, muscle_labels, gap_report, pretrigger_samples)
+    scipy.io.savemat(meta_filename, {'meta_data': meta_data})
+
+def create_recorder(bin_filename, muscle_labels):
+    """Open the trial file in the configured RECORDING_FORMAT."""
+    if RECORDING_FORMAT == 'container':
+        header = {'fs': float(SAMPLING_RATE), 'labels': muscle_labels,
+                  'session_date': recording_session_start_time.strftime("%Y-%m-%d"),
+                  'session_time': recording_session_start_time.strftime("%H:%M:%S")}
+        return ContainerRecorder(bin_filename, NUM_SENSORS, flush_interval=RECORDING_FLUSH_INTERVAL,
+                                 encoding=CONTAINER_ENCODING, header=header)
+    return StreamingRecorder(bin_filename, NUM_SENSORS, flush_interval=RECORDING_FLUSH_INTERVAL)
+
+def recording_worker(trial_handler, trial_recorder, reader):
+    """
+    Worker thread to stream samples from the handler's output ring to disk.
+    The reader starts at the trial's first sample; once the trial is stopped the
+    worker writes up to trial_recorder.stop_cursor and exits, or exits at once
+    when trial_recorder.worker_stop is set.
+    """
     print("Recording worker started.")
+    sample_clock = trial_handler.sample_clock
     try:
-        while is_recording and handler and handler.streaming:
+        while trial_handler.streaming and not trial_recorder.worker_stop.is_set():
+            if trial_recorder.stop_cursor is not None and reader.read_cursor >= trial_recorder.stop_cursor:
+                break
             try:
-                processed_data = handler.output_queue.get(timeout=1.0)
-                channel_id = processed_data['channel']
-                samples = processed_data['samples']
-                muscle_label = processed_data.get('muscle_label', f'Ch{channel_id}')
-
-                with recording_lock:
-                    if is_recording:
-                        recording_data_buffer[channel_id + 1].extend(samples)
-                        local_sample_count += len(samples)
-                        if start_time is None and local_sample_count == len(samples):
-                             start_time = time.time()
-                             print(f"Recording start time set: {start_time}")
-
-                with live_data_lock:
-                    if is_recording:
-                        live_data_buffers[channel_id].append({
-                            'samples': samples.tolist(),
-                            'label': muscle_label
-                        })
-
-            except queue.Empty:
-                 continue
+                max_frames = None
+                if trial_recorder.trigger_source == 'envelope' and trigger_evaluated_cursor is not None:
+                    max_frames = trigger_evaluated_cursor - reader.read_cursor
+                    if max_frames <= 0:
+                        # The trigger wakes the ring once it has evaluated the next block
+                        reader.ring.wait_for_write(reader.ring.write_cursor, 0.1)
+                        continue
+                frames, sample_index = reader.read(max_frames=max_frames, timeout=0.1)  # (samples, channels) float32
+                # A triggered trial may start after the reader's first sample
+                skip = trial_recorder.start_cursor - sample_index
+                if skip > 0:
+                    frames, sample_index = frames[skip:], sample_index + skip
+                # Checked after the read: everything read before the stop is at most its cursor
+                stop_cursor = trial_recorder.stop_cursor
+                if stop_cursor is not None:
+                    frames = frames[:max(0, stop_cursor - sample_index)]
+                if len(frames) == 0:
+                    continue
+                timestamps = sample_clock.timestamps(sample_index, len(frames))
+                trial_recorder.append(frames, timestamps, sample_index)
+
             except Exception as e:
                  print(f"Error in recording worker loop: {e}")
                  break
     except Exception as e:
          print(f"Unexpected error in recording worker: {e}")
     finally:
+        stats = reader.get_stats()
+        if stats['frames_lost']:
+            print(f"⚠️  Recording worker lost {stats['frames_lost']} samples per channel in {stats['overruns']} overruns")
         print("Recording worker stopped.")
 
-def start_delsys_recording():
-    """Starts the Delsys data handler and the recording worker thread."""
-    global handler, is_recording, recording_data_buffer, start_time, live_data_buffers, recording_session_start_time, trial_counter
+def connect_device():
+    """
+    Make sure a handler is connected and streaming (call with recording_lock held).
+    A persistent session handler is reused as long as it is still streaming.
+    """
+    global handler
+    if handler is not None and handler.is_alive() and handler.output_ring is not None:
+        return True
+    if device_connecting:
+        raise RuntimeError("The trigger is connecting to the device; try again shortly.")
+    if handler is not None:
+        disconnect_device()
+
+    # The previous trial's handler may still be disconnecting on the background writer
+    if not handler_released.wait(timeout=10.0):
+        raise RuntimeError("Previous recording is still stopping.")
+
+    print("🔌 Connecting to the Delsys base station...")
+    handler = create_handler()
+    if handler.start_streaming():
+        new_live_generation()
+        return True
+    try:
+        handler.stop_streaming()
+    except:
+        pass
+    handler = None
+    return False
+
+def connect_device_in_background():
+    """
+    Connect for a trigger thread, holding recording_lock only to check and install the
+    handler, so requests are not stalled for the length of a connection (which can take
+    a socket timeout). Requests that need the device meanwhile are refused by connect_device.
+    Returns True if a handler is connected.
+    """
+    global handler, device_connecting
+    with recording_lock:
+        if live_available():
+            return True
+        if operator_disconnected or device_connecting:
+            return False
+        if handler is not None:
+            disconnect_device()
+        device_connecting = True
+
+    new_handler = None
+    installed = False
+    try:
+        # The previous trial's handler may still be disconnecting on the background writer
+        if not handler_released.wait(timeout=10.0):
+            raise RuntimeError("Previous recording is still stopping.")
+        print("🔌 Connecting to the Delsys base station...")
+        new_handler = create_handler()
+        new_handler.start_streaming()
+    finally:
+        with recording_lock:
+            device_connecting = False
+            # The operator may have disconnected while the connection was being made
+            if new_handler is not None and new_handler.is_alive() and handler is None and not operator_disconnected:
+                handler = new_handler
+                installed = True
+                new_live_generation()
+        if new_handler is not None and not installed:
+            try:
+                new_handler.stop_streaming()
+            except Exception as e:
+                print(f"Error stopping handler: {e}")
+    return installed
+
+def new_live_generation():
+    """Start a new live cache generation once a handler is installed (call with recording_lock held)."""
+    global live_generation
+    live_generation += 1
+    live_snapshots.clear()
+
+def disconnect_device():
+    """
+    Stop the session handler (call with recording_lock held and no trial recording).
+    Stopped trials still read its ring and sample clock until they are saved, so the
+    handler is only stopped once the background writer has finished them.
+    """
+    global handler
+    if handler is not None:
+        print("🔌 Disconnecting from the Delsys base station...")
+        # The live view and triggers let go of the handler before it stops
+        stopping_handler, handler = handler, None
+        finalize_queue.join()
+        try:
+            stopping_handler.stop_streaming()
+        except Exception as e:
+            print(f"Error stopping handler: {e}")
+
+def start_delsys_recording(trigger_cursor=None, source='manual'):
+    """
+    Opens the trial file and starts the recording worker at trigger_cursor (a
+    device sample index, by default the newest sample); source names the trigger.
+    The handler is only connected if it is not streaming already, so with a
+    persistent connection a trial starts within one packet of the request.
+    """
+    global is_recording, recorder, recording_thread, recording_session_start_time, trial_counter
+    trial_number = None
     try:
         with recording_lock:
             if is_recording:
                 return False, "Recording already in progress."
+            if operator_disconnected:
+                return False, "Disconnected by the operator; connect first."
 
-            for i in range(len(recording_data_buffer)):
-                recording_data_buffer[i].clear()
-            start_time = None
+            if not connect_device():
+                return False, "Failed to start Delsys streaming."
 
-            with live_data_lock:
-                for buffer in live_data_buffers:
-                    buffer.clear()
 
-            if handler is not None:
-                try:
-                    handler.stop_streaming()
-                except:
-                    pass
-                handler = None
-
-            # Initialize session time and trial counter if needed
-            if recording_session_start_time is None:
-                recording_session_start_time = datetime.datetime.now()
-                trial_counter = 1
-
-            handler = DelsysDataHandler(host_ip=HOST_IP, num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE)
-
-            if handler.start_streaming():
-                is_recording = True
-                worker_thread = threading.Thread(target=recording_worker, daemon=True)
-                worker_thread.start()
-                return True, "Recording started."
-            else:
-                is_recording = False
+            # The trial starts at the trigger (which may be a sample not yet in the ring),
+            # preceded by up to PRETRIGGER_SECONDS of history (less if the device connected more recently)
+            ring = handler.output_ring
+            if trigger_cursor is None:
+                trigger_cursor = ring.write_cursor
+            start_cursor = trigger_cursor - int(PRETRIGGER_SECONDS * handler.SAMPLING_RATE)
+            reader = ring.reader(cursor=start_cursor)
+            start_cursor = max(start_cursor, reader.read_cursor)
+            with trial_counter_lock:
+                # Initialize session time and trial counter if needed
+                if recording_session_start_time is None:
+                    recording_session_start_time = datetime.datetime.now()
+                    trial_counter = 1
+                trial_number = trial_counter
+                trial_counter += 1
+            bin_filename, meta_filename = trial_filenames(trial_number)
+            recorder = create_recorder(bin_filename, list(handler.muscle_labels))
+            recorder.trial_number = trial_number
+            recorder.meta_filename = meta_filename if RECORDING_FORMAT == 'bin' else None
+            recorder.start_cursor = start_cursor
+            recorder.stop_cursor = None
+            recorder.worker_stop = threading.Event()
+            recorder.pretrigger_samples = trigger_cursor - start_cursor
+            recorder.trigger_source = source
+            # Metadata is written up front so a crashed trial can still be read
+            if recorder.meta_filename:
                 try:
-                    handler.stop_streaming()
-                except:
-                    pass
-                handler = None
-                return False, "Failed to start Delsys streaming."
+                    save_metadata(meta_filename, recorder.trial_number, list(handler.muscle_labels),
+                                  pretrigger_samples=recorder.pretrigger_samples)
+                except Exception as e:
+                    print(f"Warning: Could not save metadata: {e}")
+
+            is_recording = True
+            recording_thread = threading.Thread(target=recording_worker, args=(handler, recorder, reader), daemon=True)
+            recording_thread.start()
+            print(f"Recording to {bin_filename} from sample {recorder.start_cursor} "
+                  f"({recorder.pretrigger_samples} pre-trigger samples)")
+            return True, "Recording started."
 
     except Exception as e:
+        if trial_number is not None and not is_recording:
+            release_trial_number(trial_number)
         is_recording = False
-        if handler:
-            try:
-                handler.stop_streaming()
-            except:
-                pass
-            handler = None
+        if not PERSISTENT_CONNECTION:
+            with recording_lock:
+                disconnect_device()
         return False, f"Error starting recording: {str(e)}"
 
-def stop_delsys_recording():
-    """Stops the Delsys data handler and saves the recorded data."""
-    global handler, is_recording, recording_data_buffer, start_time, trial_counter
-    try:
-        with recording_lock:
-            if not is_recording:
-                return False, "No recording in progress."
-
-            is_recording = False
-            print("Recording flag set to False.")
+def release_trial_number(trial_number):
+    """Give back the number of a trial that kept no files, unless a later trial has taken the next one."""
+    global trial_counter
+    with trial_counter_lock:
+        if trial_counter == trial_number + 1:
+            trial_counter = trial_number
 
-        time.sleep(0.2)
+def discard_empty_trial(trial_recorder):
+    """Delete the files of a closed trial that captured no samples and give back its number."""
+    for filename in (trial_recorder.bin_filename, trial_recorder.meta_filename):
+        if filename and os.path.exists(filename):
+            try:
+                os.remove(filename)
+            except OSError as e:
+                print(f"Warning: Could not remove {filename}: {e}")
+    release_trial_number(trial_recorder.trial_number)
 
-        if handler:
-            print("Stopping Delsys handler...")
-            handler.stop_streaming()
-            handler = None
+def finalize_trial(job, trial_handler, trial_recorder, worker, release_handler):
+    """
+    Close a stopped trial's file and save its metadata (runs on the writer thread).
+    The handler is only stopped when release_handler is set, i.e. without a persistent connection.
+    """
+    job['state'] = 'stopping'
+    # The worker writes up to the stop cursor and exits within one read timeout
+    if worker is not None:
+        worker.join(timeout=2.0)
+        if worker.is_alive():
+            # The stop cursor is not in the ring yet, or the disk is slow; the file
+            # must not be closed under the worker, so stop it and wait for it
+            print("⚠️  Recording worker still running; stopping it before closing the file")
+            trial_recorder.worker_stop.set()
+            worker.join()
 
-        with recording_lock:
-             sample_counts = [len(recording_data_buffer[i]) for i in range(1, NUM_SENSORS + 1)]
-             if not sample_counts or all(count == 0 for count in sample_counts):
-                 recording_data_buffer = [[] for _ in range(NUM_SENSORS + 1)]
-                 start_time = None
-                 return False, "Recording stopped, but no data was captured."
+    sample_clock = None
+    muscle_labels = list(DelsysDataHandler.DEFAULT_MUSCLE_LABELS)
+    try:
+        if trial_handler:
+            # Keep the clock estimate; stopping the handler resets it
+            sample_clock = trial_handler.sample_clock.copy()
+            muscle_labels = list(trial_handler.muscle_labels)
+            if release_handler:
+                print("Stopping Delsys handler...")
+                trial_handler.stop_streaming()
+    finally:
+        if release_handler:
+            handler_released.set()
+    job['progress'] = 0.5
 
-             min_samples = min(sample_counts)
-             print(f"Minimum samples across channels: {min_samples}")
+    job['state'] = 'writing'
+    if trial_recorder.num_samples == 0:
+        trial_recorder.close()
+        discard_empty_trial(trial_recorder)
+        job['bin_filename'] = job['meta_filename'] = None
+        job['num_samples'] = 0
+        return False, "Recording stopped, but no data was captured."
 
-             if min_samples == 0:
-                 recording_data_buffer = [[] for _ in range(NUM_SENSORS + 1)]
-                 start_time = None
-                 return False, "Recording stopped, but no data was captured (after trimming)."
+    # Report device gaps (from the sample clock) and samples the recorder missed
+    gap_report = {}
+    if sample_clock is not None:
+        gap_report = sample_clock.get_report(trial_recorder.first_sample_index, trial_recorder.next_sample_index)
+    gap_report['recorder_lost_samples'] = float(trial_recorder.frames_lost)
+    if gap_report.get('num_gaps') or trial_recorder.frames_lost:
+        print(f"⚠️  Recording has {gap_report.get('num_gaps', 0)} device gaps "
+              f"({gap_report.get('missing_samples', 0):.0f} samples) and "
+              f"{trial_recorder.frames_lost} samples lost by the recorder")
 
-             timestamps = generate_timestamps(min_samples)
-             recording_data_buffer[0] = timestamps.tolist()
+    # Container files embed their metadata; .bin files keep it in a separate .mat file
+    num_samples = trial_recorder.close(trial_metadata(trial_recorder.trial_number, muscle_labels, gap_report,
+                                                      trial_recorder.pretrigger_samples))
+    job['num_samples'] = num_samples
+    print(f"Recording data saved to {trial_recorder.bin_filename}")
 
-             final_data_arrays = []
-             for i in range(NUM_SENSORS + 1):
-                 buffer_data = recording_data_buffer[i]
-                 if len(buffer_data) > min_samples:
-                     buffer_data = buffer_data[:min_samples]
-                 elif len(buffer_data) < min_samples:
-                     buffer_data.extend([0.0] * (min_samples - len(buffer_data)))
-                     print(f"Warning: Padding channel {i-1} data.")
+    if trial_recorder.meta_filename:
+        try:
+            save_metadata(trial_recorder.meta_filename, trial_recorder.trial_number, muscle_labels, gap_report,
+                          trial_recorder.pretrigger_samples)
+            print(f"Metadata saved to {trial_recorder.meta_filename}")
+        except Exception as e:
+             print(f"Warning: Could not save metadata: {e}")
 
-                 np_array = np.array(buffer_data, dtype=np.float64)
-                 final_data_arrays.append(np_array)
+    return True, f"Recording saved successfully ({num_samples} samples)."
 
-             recording_data_buffer = [[] for _ in range(NUM_SENSORS + 1)]
-             start_time = None
+def finalize_worker():
+    """Background writer: finalizes stopped trials in the order they were stopped."""
+    while True:
+        job_id, trial_handler, trial_recorder, worker, release_handler = finalize_queue.get()
+        job = finalize_jobs[job_id]
+        try:
+            success, message = finalize_trial(job, trial_handler, trial_recorder, worker, release_handler)
+        except Exception as e:
+            success, message = False, f"Error saving recording: {str(e)}"
+        job['progress'] = 1.0
+        job['state'] = 'done' if success else 'failed'
+        job['message'] = message
+        print(f"Finalize job {job_id}: {message}")
+        # disconnect_device waits on this before stopping the handler
+        finalize_queue.task_done()
 
-        interleaved_matrix = np.vstack(final_data_arrays)
+def stop_delsys_recording(stop_cursor=None, source=None):
+    """
+    Stops recording at stop_cursor (a device sample index, by default the newest
+    sample) and queues the trial for the background writer; returns a job id.
+    With source set, only a trial started by that trigger is stopped.
+    A persistent handler keeps streaming for the next trial.
+    """
+    global handler, is_recording, recorder, recording_thread, finalize_thread, finalize_job_counter
+    with recording_lock:
+        if not is_recording:
+            return False, "No recording in progress.", None
+        if source is not None and recorder.trigger_source != source:
+            return False, f"Recording was not started by the {source} trigger.", None
 
-        # --- Structured File Naming ---
-        global recording_session_start_time, trial_counter
-        if recording_session_start_time is None:
-             recording_session_start_time = datetime.datetime.now()
+        is_recording = False
+        print("Recording flag set to False.")
+        trial_handler = handler
+        trial_recorder, recorder = recorder, None
+        ring = trial_handler.output_ring if trial_handler is not None else None
+        if stop_cursor is None:
+            stop_cursor = ring.write_cursor if ring is not None else trial_recorder.start_cursor
+        trial_recorder.stop_cursor = stop_cursor
+        release_handler = not PERSISTENT_CONNECTION
+        if release_handler:
+            handler = None
+            handler_released.clear()
+        worker, recording_thread = recording_thread, None
 
-        timestamp_str = recording_session_start_time.strftime("%Y%m%d_%H%M%S")
-        trial_str = f"{trial_counter:04d}"
+        finalize_job_counter += 1
+        job_id = str(finalize_job_counter)
+        finalize_jobs[job_id] = {
+            'job_id': job_id,
+            'state': 'queued',
+            'progress': 0.0,
+            'trial_number': trial_recorder.trial_number,
+            'bin_filename': trial_recorder.bin_filename,
+            'meta_filename': trial_recorder.meta_filename,
+            'num_samples': None,
+            'message': "Saving recording...",
+        }
+        # Drop old finished jobs so the table stays bounded
+        finished = [key for key, job in finalize_jobs.items() if job['state'] in ('done', 'failed')]
+        for key in finished[:-FINALIZE_JOBS_KEPT]:
+            del finalize_jobs[key]
 
-        filename_base = f"{timestamp_str}_Trl{trial_str}"
-        bin_filename = os.path.join(SAVE_DIRECTORY, f"{filename_base}.bin")
-        meta_filename = os.path.join(METADATA_DIRECTORY, f"{timestamp_str}_METADATATrl{trial_str}.mat")
+        if finalize_thread is None or not finalize_thread.is_alive():
+            finalize_thread = threading.Thread(target=finalize_worker, daemon=True)
+            finalize_thread.start()
+        finalize_queue.put((job_id, trial_handler, trial_recorder, worker, release_handler))
+    return True, "Recording stopped, saving...", job_id
 
+def envelope_trigger_worker(trigger):
+    """Trigger thread: starts and stops trials where the EMG envelope crosses its thresholds."""
+    global trigger_evaluated_cursor
+    print("🎯 Envelope trigger started.")
+    reader = None
+    while not triggers_stopping.is_set():
         try:
-            interleaved_matrix.tofile(bin_filename)
-            print(f"Binary data saved to {bin_filename}")
+            # The handler can be swapped or stopped by a request at any time, so it is only
+            # looked at under the lock; the ring it hands out stays readable after a stop
+            with recording_lock:
+                ring = handler.output_ring if live_available() else None
+            if ring is None:
+                # Retry the connection, or wait for POST /connect after an operator disconnect
+                if not connect_device_in_background():
+                    triggers_stopping.wait(0.5 if operator_disconnected else 2.0)
+                continue
+            if reader is None or reader.ring is not ring:
+                reader = ring.reader()
+                trigger.reset()
+            frames, sample_index = reader.read(timeout=0.1)
+            for event, event_index in trigger.process(frames, sample_index):
+                if event == 'start':
+                    success, message = start_delsys_recording(trigger_cursor=event_index, source='envelope')
+                else:
+                    success, message, _ = stop_delsys_recording(stop_cursor=event_index, source='envelope')
+                print(f"🎯 Envelope {event} at sample {event_index}: {message}")
+            # Only now may the recording worker write these samples
+            trigger_evaluated_cursor = reader.read_cursor
+            ring.wake()
         except Exception as e:
-            return False, f"Error saving binary file: {e}"
+            print(f"Error in envelope trigger: {e}")
+            # Start over on a fresh reader of whatever handler is connected next
+            reader = None
+            triggers_stopping.wait(0.5)
+    print("🎯 Envelope trigger stopped.")
 
-        try:
-            meta_data = {}
-            meta_data['emg_ch_number'] = np.array(range(1, NUM_SENSORS + 1))
-            meta_data['fs'] = float(SAMPLING_RATE)
-            meta_data['total_analog_in_ch'] = float(NUM_SENSORS)
-            if handler and hasattr(handler, 'muscle_labels'):
-                meta_data['musc_labels'] = handler.muscle_labels
-            else:
-                meta_data['musc_labels'] = [
-                     'L-TIBI', 'L-GAST', 'L-RECT-DIST', 'L-RECT-PROX', 'L-VAST-LATE',
-                     'R-TIBI', 'R-GAST', 'R-RECT-DIST', 'R-RECT-PROX', 'R-VAST-LATE',
-                     'L-SEMI', 'R-SEMI', 'NC', 'NC', 'L-BICEP-FEMO', 'R-BICEP-FEMO'
-                ]
-            meta_data['session_date'] = recording_session_start_time.strftime("%Y-%m-%d")
-            meta_data['session_time'] = recording_session_start_time.strftime("%H:%M:%S")
-            meta_data['trial_number'] = int(trial_counter)
-
-            scipy.io.savemat(meta_filename, {'meta_data': meta_data})
-            print(f"Metadata saved to {meta_filename}")
-        except Exception as e:
-             print(f"Warning: Could not save metadata: {e}")
+def message_sample_index(received_time):
+    """
+    Device sample index at which a trigger message arrived, or None if not connected.
+    The sample clock places it between packets; every sample already in the ring
+    arrived before the message, so the ring's write cursor is a lower bound
+    (it also covers the first second, before the clock fit has settled).
+    """
+    current_handler = handler
+    if current_handler is None or not current_handler.is_alive() or current_handler.output_ring is None:
+        return None
+    write_cursor = current_handler.output_ring.write_cursor
+    sample_clock = current_handler.sample_clock
+    if sample_clock.state[sample_clock.UPDATES] == 0:
+        return write_cursor
+    return max(write_cursor, int(round(sample_clock.index_at(received_time))))
 
-        # Increment trial counter for the next recording
-        trial_counter += 1
+def handle_trigger_message(message, received_time):
+    """MessageListener callback: segment trials on experiment-control messages."""
+    cursor = message_sample_index(received_time)
+    msg_type = message['msg_type']
+    print(f"📨 {message['name']} (serial {message['serial_no']}) at sample {cursor}")
+    if msg_type == TRIAL_START and is_recording:
+        # A new task trial ends the current recording at the same sample
+        success, text, _ = stop_delsys_recording(stop_cursor=cursor)
+        print(f"📨 {text}")
+    if msg_type in (START_RECORDING, TRIAL_START):
+        success, text = start_delsys_recording(trigger_cursor=cursor, source='message')
+    elif msg_type in (STOP_RECORDING, TRIAL_END):
+        success, text, _ = stop_delsys_recording(stop_cursor=cursor)
+    else:
+        return
+    print(f"📨 {text}")
 
-        return True, f"Recording saved successfully ({min_samples} samples)."
+def start_triggers(config):
+    """Start the configured automatic trigger (nothing in 'manual' mode)."""
+    global TRIGGER_MODE, trigger_thread, trigger_listener
+    TRIGGER_MODE = config['trigger_mode']
+    if TRIGGER_MODE == 'envelope':
+        trigger = EnvelopeTrigger(SAMPLING_RATE, NUM_SENSORS, config['trigger_on_threshold'],
+                                  config['trigger_off_threshold'],
+                                  min_active_channels=int(config['trigger_min_channels']),
+                                  hold_off=float(config['trigger_hold_off']))
+        triggers_stopping.clear()
+        trigger_thread = threading.Thread(target=envelope_trigger_worker, args=(trigger,), daemon=True)
+        trigger_thread.start()
+    elif TRIGGER_MODE == 'messages':
+        trigger_listener = MessageListener(handle_trigger_message, port=int(config['message_port']),
+                                           message_types={TRIAL_START, TRIAL_END, START_RECORDING, STOP_RECORDING})
+        trigger_listener.start()
+        if config['message_handler']:
+            handler_host, handler_port = config['message_handler'].rsplit(':', 1)
+            trigger_listener.register(handler_host, int(handler_port), int(config['message_module_id']))
 
-    except Exception as e:
-        with recording_lock:
-            recording_data_buffer = [[] for _ in range(NUM_SENSORS + 1)]
-            start_time = None
-        if handler:
-            try:
-                handler.stop_streaming()
-            except:
-                pass
-            handler = None
-        return False, f"Error stopping recording: {str(e)}"
+def stop_triggers():
+    """Stop the automatic trigger."""
+    global trigger_thread, trigger_listener
+    triggers_stopping.set()
+    if trigger_thread is not None:
+        trigger_thread.join(timeout=2.0)
+        trigger_thread = None
+    if trigger_listener is not None:
+        trigger_listener.stop()
+        trigger_listener = None
 
 # --- Flask Routes ---
-@app.route('/')
+@bp.route('/')
 def index():
-    labels = handler.muscle_labels if handler and hasattr(handler, 'muscle_labels') else [f'Ch{i}' for i in range(NUM_SENSORS)]
+    labels = handler.muscle_labels if handler and hasattr(handler, 'muscle_labels') else DelsysDataHandler.DEFAULT_MUSCLE_LABELS
     return render_template('index.html', num_sensors=NUM_SENSORS, muscle_labels=labels)
 
-@app.route('/start_recording', methods=['POST'])
+@bp.route('/start_recording', methods=['POST'])
 def start_recording():
     success, message = start_delsys_recording()
     return jsonify({'success': success, 'message': message})
 
-@app.route('/stop_recording', methods=['POST'])
+@bp.route('/stop_recording', methods=['POST'])
 def stop_recording():
-    success, message = stop_delsys_recording()
-    return jsonify({'success': success, 'message': message})
+    success, message, job_id = stop_delsys_recording()
+    return jsonify({'success': success, 'message': message, 'job_id': job_id})
+
+@bp.route('/recording_status/<job_id>')
+def recording_status(job_id):
+    job = finalize_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f"Unknown job {job_id}."}), 404
+    return jsonify(dict(job, success=job['state'] != 'failed'))
+
+@bp.route('/connect', methods=['POST'])
+def connect():
+    """Connect to the device ahead of the first trial, so it too starts without connection delay."""
+    global operator_disconnected
+    try:
+        with recording_lock:
+            operator_disconnected = False
+            success = connect_device()
+    except Exception as e:
+        return jsonify({'success': False, 'message': f"Error connecting: {str(e)}"})
+    return jsonify({'success': success, 'message': "Connected." if success else "Failed to start Delsys streaming."})
+
+@bp.route('/disconnect', methods=['POST'])
+def disconnect():
+    """
+    End the session's device connection (e.g. to change sensors); not allowed while recording.
+    Nothing reconnects, including the triggers and /start_recording, until POST /connect.
+    """
+    global operator_disconnected
+    with recording_lock:
+        if is_recording:
+            return jsonify({'success': False, 'message': "Stop the recording first."})
+        operator_disconnected = True
+        disconnect_device()
+    return jsonify({'success': True, 'message': "Disconnected."})
+
+@bp.route('/health')
+def health():
+    """
+    Liveness for supervisors: startup time, device connection and whether a trial is recording.
+    Also carries the channel labels, which binary live frames do not, for the page's chart titles.
+    """
+    return jsonify({'status': 'ok', 'recording': is_recording, 'connected': live_available(),
+                    'trigger_mode': TRIGGER_MODE, 'labels': live_labels(),
+                    'startup_seconds': current_app.config['STARTUP_SECONDS'],
+                    'uptime_seconds': time.perf_counter() - APP_START_TIME})
 
-@app.route('/live_data')
+def live_available():
+    """True if the handler is streaming, so the live view has samples to show."""
+    return handler is not None and handler.is_alive() and handler.output_ring is not None
+
+def live_labels():
+    """Muscle label of every live channel, padded with ChN for unlabelled channels."""
+    current_handler = handler
+    labels = current_handler.muscle_labels if current_handler is not None else DelsysDataHandler.DEFAULT_MUSCLE_LABELS
+    labels = list(labels[:NUM_SENSORS])
+    return labels + [f'Ch{i}' for i in range(len(labels), NUM_SENSORS)]
+
+def live_since():
+    """The client's cursor from ?since=, or None for a full resync."""
+    since = request.args.get('since', type=int)
+    return since if since is not None and since >= 0 else None
+
+def live_frames():
+    """
+    Live samples for the request's query: (frames, sequence, flags, samples per point).
+    ?points=N&window=SECONDS returns the newest window min/max-decimated to about N
+    points; otherwise ?since= selects the samples after the client's cursor.
+    """
+    ring = handler.output_ring
+    points = request.args.get('points', type=int)
+    if points is None:
+        frames, start, resync = live_window(ring, live_since(), LIVE_BUFFER_CHUNKS * LIVE_SAMPLES_PER_CHUNK)
+        return frames, start, LIVE_FLAG_RESYNC if resync else 0, 1
+
+    window = request.args.get('window', type=float)
+    num_samples = LIVE_BUFFER_CHUNKS * LIVE_SAMPLES_PER_CHUNK
+    if window is not None and window > 0:
+        num_samples = int(window * handler.SAMPLING_RATE)
+    num_samples = min(num_samples, ring.capacity - ring.guard)
+    frames, start = ring.latest(num_samples)
+    frames, dropped, step = decimate_minmax(frames, max(2, points))
+    flags = LIVE_FLAG_RESYNC | (LIVE_FLAG_DECIMATED if step > 1 else 0)
+    return frames, start + dropped, flags, step
+
+def live_snapshot_key(kind):
+    """Cache key of a live response: the connection and the producer's position plus the query."""
+    # Read before the ring: a handler swapped in between is only cached under the old generation
+    generation = live_generation
+    ring = handler.output_ring
+    return (kind, generation, ring.write_cursor, live_since(), request.args.get('points', type=int),
+            request.args.get('window', type=float))
+
+@bp.route('/live_data')
 def live_data():
-    global live_data_buffers, is_recording
+    """
+    Live samples as JSON. With ?since=<next sequence>, only samples after the
+    client's cursor are returned; 'resync' means the data replaces the client's.
+    With ?points=&window=, a decimated window is returned; 'step' is samples per point pair.
+    Responses are served from live_snapshots, so concurrent viewers share one serialization.
+    """
+    empty = {'data': [[] for _ in range(NUM_SENSORS)], 'labels': [f'Ch{i}' for i in range(NUM_SENSORS)],
+             'sequence': 0, 'next': 0, 'resync': True, 'step': 1}
+
+    def build():
+        frames, start, flags, step = live_frames()
+        labels = live_labels()
+        next_sequence = start + (len(frames) // 2 * step if flags & LIVE_FLAG_DECIMATED else len(frames))
+        return current_app.json.dumps({'data': frames.T.tolist(), 'labels': labels, 'sequence': start,
+                               'next': next_sequence, 'resync': bool(flags & LIVE_FLAG_RESYNC),
+                               'step': step}).encode()
+
     try:
-        if not is_recording:
-            return jsonify({'data': [[] for _ in range(NUM_SENSORS)], 'labels': [f'Ch{i}' for i in range(NUM_SENSORS)]})
-
-        with live_data_lock:
-            data_chunks = []
-            labels = []
-            for i in range(NUM_SENSORS):
-                channel_chunks = []
-                for chunk_dict in live_data_buffers[i]:
-                    channel_chunks.extend(chunk_dict['samples'])
-
-                data_chunks.append(channel_chunks)
-                if live_data_buffers[i]:
-                    labels.append(live_data_buffers[i][-1]['label'])
-                else:
-                    labels.append(f'Ch{i}')
+        if not live_available():
+            return jsonify(empty)
+        payload = live_snapshots.get(live_snapshot_key('json'), build)
+        return Response(payload, mimetype='application/json', headers={'Cache-Control': 'no-store'})
+    except Exception as e:
+        print(f"Error fetching live data: {e}")
+        return jsonify(empty)
+
+@bp.route('/live_data.bin')
+def live_data_binary():
+    """
+    Live samples as one binary live frame (see live_view.py); empty when not connected.
+    Accepts the same query as /live_data; the samples per point pair of a
+    decimated frame are in the X-Live-Step header.
+    """
+    def build():
+        frames, start, flags, step = live_frames()
+        return pack_live_frame(frames, start, flags), step
 
-        return jsonify({'data': data_chunks, 'labels': labels})
+    step = 1
+    try:
+        if not live_available():
+            payload = pack_live_frame(np.zeros((0, NUM_SENSORS), dtype=np.float32), 0, LIVE_FLAG_RESYNC)
+        else:
+            payload, step = live_snapshots.get(live_snapshot_key('bin'), build)
     except Exception as e:
         print(f"Error fetching live data: {e}")
-        return jsonify({'data': [[] for _ in range(NUM_SENSORS)], 'labels': [f'Ch{i}' for i in range(NUM_SENSORS)]})
+        payload = pack_live_frame(np.zeros((0, NUM_SENSORS), dtype=np.float32), 0, LIVE_FLAG_RESYNC)
+    return Response(payload, mimetype=LIVE_FRAME_MIMETYPE, headers={'Cache-Control': 'no-store', 'X-Live-Step': str(step)})
+
+@bp.route('/live_stream')
+def live_stream():
+    """
+    Server-sent events: one base64 live frame per new block, as soon as it is in the ring.
+    Each client keeps its own cursor, so a slow client only delays itself; once it
+    falls a full window behind it is resynced to the newest samples. The event id
+    is the next sequence, so a reconnecting EventSource resumes where it left off.
+    """
+    slots = live_stream_slots
+    if not slots.acquire(blocking=False):
+        return jsonify({'success': False, 'message': "Too many live streams; poll /live_data.bin instead."}), 503
+    since = request.headers.get('Last-Event-ID', type=int)
+    window = LIVE_BUFFER_CHUNKS * LIVE_SAMPLES_PER_CHUNK
+
+    def stream_event(ring, cursor):
+        """Encoded event for a client at cursor, and the client's next cursor."""
+        frames, start, resync = live_window(ring, cursor, window)
+        next_cursor = start + len(frames)
+        payload = pack_live_frame(frames, start, LIVE_FLAG_RESYNC if resync else 0)
+        return f"id: {next_cursor}\ndata: {base64.b64encode(payload).decode()}\n\n", next_cursor
+
+    def events():
+        cursor = since
+        generation = live_generation
+        stream_handler = handler
+        last_event = time.monotonic()
+        while handler is stream_handler and live_available():
+            ring = stream_handler.output_ring
+            if ring is None:
+                break
+            if cursor is not None and ring.write_cursor == cursor:
+                if time.monotonic() - last_event > LIVE_STREAM_KEEPALIVE:
+                    last_event = time.monotonic()
+                    yield ": keep-alive\n\n"
+                # Woken by the producer's next block; the timeout rechecks the connection
+                ring.wait_for_write(cursor, 0.5)
+                continue
+            event, cursor = live_snapshots.get(('sse', generation, ring.write_cursor, cursor),
+                                               lambda: stream_event(ring, cursor))
+            last_event = time.monotonic()
+            yield event
+        yield "event: end\ndata: \n\n"
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+    # Released when the server closes the response, even if the stream never started
+    response.call_on_close(slots.release)
+    return response
+
+def shutdown():
+    """Stop the triggers and any running acquisition; called when the server exits."""
+    global handler
+    stop_triggers()
+    if handler:
+        try:
+            handler.stop_streaming()
+        except Exception as e:
+            print(f"Error stopping handler on shutdown: {e}")
+        handler = None
+
+def serve(app):
+    """
+    Serve the app with the configured server.
+    Acquisition runs on its own threads (or process) and hands samples to the web
+    tier only through the output ring, so slow HTTP clients never stall it; the
+    production servers give requests their own bounded thread pool.
+    """
+    config = app.config['EMG']
+    host, port, server = config['bind_host'], config['port'], config['server']
+    if server == 'development':
+        app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
+        return
+    if server in ('auto', 'waitress'):
+        try:
+            import waitress
+        except ImportError:
+            if server == 'waitress':
+                raise
+            print("⚠️  waitress is not installed; using the threaded werkzeug server")
+        else:
+            print(f"🚀 Serving with waitress on {host}:{port} ({config['threads']} threads)")
+            waitress.serve(app, host=host, port=port, threads=int(config['threads']), ident='EMG Recorder')
+            return
+    from werkzeug.serving import make_server
+    print(f"🚀 Serving with the threaded werkzeug server on {host}:{port}")
+    make_server(host, port, app, threaded=True).serve_forever()
+
+def parse_args(argv=None):
+    """Command-line overrides for the configuration."""
+    import argparse
+    parser = argparse.ArgumentParser(description="EMG recorder web app.")
+    parser.add_argument('--config', help="JSON configuration file (default: $EMG_CONFIG)")
+    parser.add_argument('--save-dir', dest='save_directory', help="Directory for recordings")
+    parser.add_argument('--host-ip', help="Address of the Trigno Control Utility")
+    parser.add_argument('--num-sensors', type=int)
+    parser.add_argument('--sampling-rate', type=float)
+    parser.add_argument('--acquisition-process', action='store_true', default=None,
+                        help="Run acquisition in a separate process")
+    parser.add_argument('--per-trial-connection', dest='persistent_connection', action='store_false', default=None,
+                        help="Reconnect to the device for every trial instead of staying connected")
+    parser.add_argument('--recording-format', choices=['bin', 'container'])
+    parser.add_argument('--pretrigger-seconds', type=float, help="History before Record prepended to each trial")
+    parser.add_argument('--trigger-mode', choices=list(TRIGGER_MODES))
+    parser.add_argument('--trigger-on-threshold', type=float, help="Envelope level (V) that starts a trial")
+    parser.add_argument('--trigger-off-threshold', type=float, help="Envelope level (V) that ends a trial")
+    parser.add_argument('--message-port', type=int, help="UDP port for MessageHandler trigger messages")
+    parser.add_argument('--bind-host', help="Interface to serve on")
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--server', choices=['auto', 'waitress', 'werkzeug', 'development'])
+    parser.add_argument('--threads', type=int, help="Request threads of the production server")
+    args = vars(parser.parse_args(argv))
+    return args.pop('config'), args
 
 if __name__ == '__main__':
+    import signal
+    config_file, overrides = parse_args()
+    app = create_app(overrides, config_file)
+    # A supervisor's SIGTERM should stop acquisition cleanly too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     try:
         print("Starting Flask server...")
         print(f"Recordings will be saved to: {os.path.abspath(SAVE_DIRECTORY)}")
-        handler = DelsysDataHandler(host_ip=HOST_IP, num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE)
         recording_session_start_time = datetime.datetime.now()
-        app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
+        serve(app)
     finally:
         print("Flask server shutting down...")
-        if handler:
-            try:
-                handler.stop_streaming()
-            except Exception as e:
-                print(f"Error stopping handler on shutdown: {e}")
\ No newline at end of file
+        shutdown()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+asyncio acquisition core for the Delsys Trigno SDK.
+Handles the command port (50040), EMG port (50041) and optionally the ACC port
+(50042) on a single event loop. Command replies are awaited instead of slept
+on, and data streams are read in exact packet frames.
+"""
+import asyncio
+import socket
+import numpy as np
+
+
+class AsyncDelsysClient:
+    """
+    Single-event-loop client for the Trigno command, EMG and ACC streams.
+    Complete packets are handed to on_emg / on_acc as float32 arrays.
+    """
+
+    def __init__(self, host_ip='localhost', comm_port=50040, emg_port=50041, acc_port=50042,
+                 emg_packet_bytes=1728, acc_packet_bytes=384, on_emg=None, on_acc=None,
+                 reply_timeout=0.5):
+        """
+        Args:
+            host_ip (str): Address of the Trigno Control Utility.
+            comm_port, emg_port, acc_port (int): SDK ports; ACC is only opened if on_acc is given.
+            emg_packet_bytes, acc_packet_bytes (int): Frame size of each data stream.
+            on_emg, on_acc (callable): Called with each packet as a float32 array.
+            reply_timeout (float): Seconds to wait for a command reply.
+        """
+        self.HOST_IP = host_ip
+        self.comm_port = comm_port
+        self.emg_port = emg_port
+        self.acc_port = acc_port
+        self.emg_packet_bytes = emg_packet_bytes
+        self.acc_packet_bytes = acc_packet_bytes
+        self.on_emg = on_emg
+        self.on_acc = on_acc
+        self.reply_timeout = reply_timeout
+
+        self.comm = None
+        self.emg = None
+        self.acc = None
+        self.stop_event = None
+        self.packets_received = {'emg': 0, 'acc': 0}
+
+    async def _open(self, port):
+        """Open a stream connection with a large receive buffer."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
+        sock.setblocking(False)
+        await asyncio.wait_for(asyncio.get_running_loop().sock_connect(sock, (self.HOST_IP, port)), 10)
+        return await asyncio.open_connection(sock=sock)
+
+    async def connect(self):
+        """Open all connections concurrently and read the server banner."""
+        print("🔌 Establishing connections...")
+        ports = [self.comm_port, self.emg_port] + ([self.acc_port] if self.on_acc else [])
+        streams = await asyncio.gather(*(self._open(port) for port in ports))
+        self.comm, self.emg = streams[0], streams[1]
+        if self.on_acc:
+            self.acc = streams[2]
+        print(f"✅ {len(streams)} connections established")
+        banner = await self.read_reply()
+        if banner:
+            print(f"📡 {banner}")
+
+    async def read_reply(self, timeout=None):
+        """Await the next non-empty reply line on the command port, or None on timeout."""
+        reader = self.comm[0]
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readuntil(b'\r\n'), timeout or self.reply_timeout)
+                reply = line.decode().strip()
+                if reply:
+                    return reply
+        except asyncio.TimeoutError:
+            return None
+
+    async def send_command(self, command, expect_reply=True):
+        """Send a command and await its reply."""
+        writer = self.comm[1]
+        writer.write(f"{command}\r\n\r\n".encode())
+        await writer.drain()
+        if expect_reply:
+            return await self.read_reply()
+        return None
+
+    async def _read_stream(self, name, reader, packet_bytes, callback):
+        """Read exact packet frames from a data stream until stopped."""
+        print(f"🔄 {name.upper()} reader started")
+        try:
+            while not self.stop_event.is_set():
+                data_bytes = await reader.readexactly(packet_bytes)
+                self.packets_received[name] += 1
+                callback(np.frombuffer(data_bytes, dtype=np.float32))
+        except asyncio.IncompleteReadError:
+            if not self.stop_event.is_set():
+                print(f"❌ {name.upper()} stream closed by server")
+        except (ConnectionError, OSError) as e:
+            if not self.stop_event.is_set():
+                print(f"❌ {name.upper()} socket error: {e}")
+        print(f"🔄 {name.upper()} reader stopped ({self.packets_received[name]} packets)")
+
+    async def stream(self):
+        """Read every data stream until stop() is called or a stream ends."""
+        self.stop_event = self.stop_event or asyncio.Event()
+        tasks = [asyncio.create_task(self._read_stream('emg', self.emg[0], self.emg_packet_bytes, self.on_emg))]
+        if self.acc:
+            tasks.append(asyncio.create_task(self._read_stream('acc', self.acc[0], self.acc_packet_bytes, self.on_acc)))
+        stop_task = asyncio.create_task(self.stop_event.wait())
+        await asyncio.wait(tasks + [stop_task], return_when=asyncio.FIRST_COMPLETED)
+        self.stop_event.set()
+        for task in tasks + [stop_task]:
+            task.cancel()
+        await asyncio.gather(*tasks, stop_task, return_exceptions=True)
+
+    def stop(self):
+        """Ask stream() to finish; must be called on the event loop."""
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    async def close(self):
+        """Close all connections."""
+        for stream, name in [(self.comm, "Command"), (self.emg, "EMG"), (self.acc, "ACC")]:
+            if stream:
+                try:
+                    stream[1].close()
+                    await stream[1].wait_closed()
+                    print(f"✅ {name} connection closed")
+                except (ConnectionError, OSError):
+                    pass
+        self.comm = self.emg = self.acc = None
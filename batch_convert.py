@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Converts a session directory's recordings to structs/*.mat in parallel.
+Each struct has the layout that misc/readDAQData.m saves, so the MATLAB
+analysis can load it directly: Fs, time, the DAQ analog-in labels, and one
+field per connected muscle. Only trials whose struct is missing or older than
+the recording or its metadata are converted, so it is safe to re-run on a
+session folder that is still growing.
+
+Usage: python batch_convert.py SESSION_DIR [--workers N] [--force] [--min-age SECONDS]
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from recording_reader import open_recording, recording_filenames
+
+# Analog-in labels of the DAQ rig, mapped to data rows 1..16 as in readDAQData.m
+DAQ_LABELS = [
+    'HUMAC_DIR', 'HUMAC_VEL', 'HUMAC_TRQ', 'HUMAC_POS',
+    'KINARM_TASK', 'KINARM_REC', 'KINARM_REP', 'VICON_REC', 'VICON_FRAME',
+    'PHOTODIODE', 'GRIP', 'PINCH', 'ARDUINO_TRIG', 'ARDUINO_AMP',
+    'ARDUINO_ACTIVE', 'DS8R_SYNC'
+]
+
+
+def struct_field_name(label):
+    """MATLAB field name for a muscle label ('-' and spaces become '_')."""
+    return re.sub(r'\W', '_', label.strip())
+
+
+def build_struct(recording):
+    """Return the readDAQData.m struct of a recording as a dictionary of arrays."""
+    timestamps, samples = recording.read()
+    samples = samples.astype(np.float64, copy=False)
+    result = {'Fs': recording.fs, 'time': timestamps}
+    for row, label in enumerate(DAQ_LABELS[:recording.num_channels]):
+        result[label] = samples[row]
+    for channel, label in enumerate(recording.labels):
+        # Unconnected channels are skipped; padding labels (ChN) are not muscles either
+        if label == 'NC' or label == f'Ch{channel}':
+            continue
+        result[struct_field_name(label)] = samples[channel]
+    return result
+
+
+def struct_filename(data_filename):
+    """structs/<trial>.mat next to a recording."""
+    directory, name = os.path.split(data_filename)
+    return os.path.join(directory, 'structs', os.path.splitext(name)[0] + '.mat')
+
+
+def source_mtime(recording):
+    """Latest modification time of a recording's data and metadata files."""
+    mtime = os.path.getmtime(recording.bin_filename)
+    meta_filename = getattr(recording, 'meta_filename', None)
+    if meta_filename:
+        mtime = max(mtime, os.path.getmtime(meta_filename))
+    return mtime
+
+
+def needs_conversion(recording, force=False, min_age=5.0):
+    """True if the trial's struct is missing or stale, and the trial is no longer being written."""
+    mtime = source_mtime(recording)
+    if time.time() - mtime < min_age:
+        return False
+    target = struct_filename(recording.bin_filename)
+    return force or not os.path.exists(target) or os.path.getmtime(target) < mtime
+
+
+def convert_trial(data_filename):
+    """Worker: convert one recording; returns (struct filename, samples, seconds)."""
+    import scipy.io
+    start = time.perf_counter()
+    recording = open_recording(data_filename)
+    target = struct_filename(data_filename)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write to a temporary file first so an interrupted run never leaves a truncated struct
+    temporary = target + '.tmp'
+    with open(temporary, 'wb') as f:
+        scipy.io.savemat(f, build_struct(recording))
+    os.replace(temporary, target)
+    return target, recording.num_samples, time.perf_counter() - start
+
+
+def find_pending(directory, force=False, min_age=5.0):
+    """Recordings in a session directory that need converting."""
+    pending = []
+    for filename in recording_filenames(directory):
+        try:
+            if needs_conversion(open_recording(filename), force, min_age):
+                pending.append(filename)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Skipping {os.path.basename(filename)}: {e}")
+    return pending
+
+
+def convert_directory(directory, workers=None, force=False, min_age=5.0):
+    """Convert every pending trial in a directory on a process pool; returns the number converted."""
+    pending = find_pending(directory, force, min_age)
+    if not pending:
+        print("✅ All structs are up to date")
+        return 0
+    print(f"⚙️  Converting {len(pending)} trials with {workers or os.cpu_count()} workers...")
+    start = time.perf_counter()
+    converted = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(convert_trial, filename): filename for filename in pending}
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                target, num_samples, seconds = future.result()
+                converted += 1
+                print(f"✅ {name} -> {os.path.relpath(target, directory)} ({num_samples} samples, {seconds:.2f} s)")
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+    print(f"📊 Converted {converted}/{len(pending)} trials in {time.perf_counter() - start:.2f} s")
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert recordings to MATLAB structs in parallel.")
+    parser.add_argument('directory', help="Session directory containing the .bin/.emgc recordings")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--force', action='store_true', help="Convert every trial, even if up to date")
+    parser.add_argument('--min-age', type=float, default=5.0,
+                        help="Skip recordings modified in the last N seconds (still being written)")
+    args = parser.parse_args()
+    convert_directory(args.directory, args.workers, args.force, args.min_age)
+
+
+if __name__ == "__main__":
+    main()
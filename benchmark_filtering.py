@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the EMG filtering paths.
+Compares filtering every channel separately against filtering the whole
+(channels x samples) block in one vectorized call, at several channel counts.
+Reports processed blocks per second, SciPy calls per second and the CPU
+needed to keep up with a real-time stream.
+"""
+import sys
+import time
+import numpy as np
+from emg_filters import StreamingEMGFilter
+
+
+SAMPLING_RATE = 2000.0
+BLOCK_SIZE = 75          # Samples per processing block (ACCUMULATION_SIZE)
+CHANNEL_COUNTS = [16, 32, 64]
+DURATION = 2.0           # Seconds spent timing each configuration
+
+
+def run_path(num_channels, batched, envelope, duration=DURATION):
+    """Filter random blocks for `duration` seconds and return timing figures."""
+    engine = StreamingEMGFilter(SAMPLING_RATE, num_channels, envelope=envelope)
+    blocks = np.random.randn(32, num_channels, BLOCK_SIZE) * 0.001
+    calls_per_block = 1 if batched else num_channels
+    if envelope:
+        calls_per_block *= 2
+
+    num_blocks = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while time.perf_counter() - wall_start < duration:
+        block = blocks[num_blocks % len(blocks)]
+        if batched:
+            engine.process_block(block)
+        else:
+            for channel in range(num_channels):
+                engine.process_channel(channel, block[channel])
+        num_blocks += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    # Fraction of one core needed to process blocks as fast as the device produces them
+    realtime_blocks_per_s = SAMPLING_RATE / BLOCK_SIZE
+    cpu_per_block = cpu / num_blocks
+    return {
+        'blocks_per_s': num_blocks / wall,
+        'calls_per_s': num_blocks * calls_per_block / wall,
+        'cpu_per_block_us': cpu_per_block * 1e6,
+        'realtime_cpu_pct': cpu_per_block * realtime_blocks_per_s * 100,
+    }
+
+
+def main():
+    envelope = '--envelope' in sys.argv
+    print(f"📊 Filtering benchmark ({BLOCK_SIZE}-sample blocks at {SAMPLING_RATE:.0f} Hz, envelope={envelope})")
+    header = f"{'channels':>8} {'path':>12} {'blocks/s':>10} {'calls/s':>10} {'us/block':>10} {'real-time CPU':>14}"
+    print(header)
+    print('-' * len(header))
+    for num_channels in CHANNEL_COUNTS:
+        results = {}
+        for path, batched in [('per-channel', False), ('batched', True)]:
+            results[path] = run_path(num_channels, batched, envelope)
+            r = results[path]
+            print(f"{num_channels:>8} {path:>12} {r['blocks_per_s']:>10.0f} {r['calls_per_s']:>10.0f} "
+                  f"{r['cpu_per_block_us']:>10.1f} {r['realtime_cpu_pct']:>13.2f}%")
+        speedup = results['per-channel']['cpu_per_block_us'] / results['batched']['cpu_per_block_us']
+        print(f"{'':>8} {'speedup':>12} {speedup:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
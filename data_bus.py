@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Publish/subscribe fan-out for processed EMG messages.
+Every subscriber has its own bounded buffer and backpressure policy, so a slow
+or added subscriber never changes what the other subscribers receive.
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+
+class Subscription:
+    """
+    Bounded per-subscriber message buffer with a queue.Queue-like interface.
+    Backpressure policies applied when the publisher outpaces the subscriber:
+        'drop_oldest': discard the oldest buffered message to make room.
+        'block':       make the publisher wait up to block_timeout for room, but
+                       never past the publish cycle's deadline (see DataBus.publish),
+                       then fall back to dropping the oldest message so the
+                       acquisition thread can never stall indefinitely.
+        'decimate':    once the buffer is half full, accept only every
+                       decimation-th message; drop the oldest if it still fills up.
+    """
+
+    POLICIES = ('drop_oldest', 'block', 'decimate')
+
+    def __init__(self, name, maxsize=1000, policy='drop_oldest', block_timeout=0.05, decimation=4):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.decimation = decimation
+        self.messages = deque()
+        self.condition = threading.Condition()
+
+        # Counters
+        self.delivered = 0
+        self.dropped = 0
+        self.decimated = 0
+        self._offered = 0
+
+    def put(self, message, deadline=None):
+        """
+        Offer a message to this subscriber, applying its backpressure policy.
+        deadline (monotonic seconds) caps how long the 'block' policy may wait.
+        """
+        with self.condition:
+            self._offered += 1
+            if self.policy == 'decimate' and len(self.messages) >= self.maxsize // 2:
+                if self._offered % self.decimation:
+                    self.decimated += 1
+                    return
+            elif self.policy == 'block' and len(self.messages) >= self.maxsize:
+                timeout_deadline = time.monotonic() + self.block_timeout
+                deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+                while len(self.messages) >= self.maxsize:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            if len(self.messages) >= self.maxsize:
+                self.messages.popleft()
+                self.dropped += 1
+            self.messages.append(message)
+            self.delivered += 1
+            self.condition.notify_all()
+
+    def get(self, block=True, timeout=None):
+        """Remove and return the oldest message; raise queue.Empty if none arrives."""
+        with self.condition:
+            if block:
+                if not self.condition.wait_for(lambda: self.messages, timeout):
+                    raise queue.Empty
+            elif not self.messages:
+                raise queue.Empty
+            message = self.messages.popleft()
+            self.condition.notify_all()
+            return message
+
+    def get_nowait(self):
+        """Remove and return the oldest message without waiting."""
+        return self.get(block=False)
+
+    def qsize(self):
+        """Number of buffered messages."""
+        return len(self.messages)
+
+    def empty(self):
+        """True if no messages are buffered."""
+        return not self.messages
+
+    def clear(self):
+        """Discard all buffered messages."""
+        with self.condition:
+            self.messages.clear()
+            self.condition.notify_all()
+
+    def get_stats(self):
+        """Return a dictionary of subscription counters."""
+        return {
+            'name': self.name,
+            'policy': self.policy,
+            'buffered': len(self.messages),
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'decimated': self.decimated,
+        }
+
+
+class DataBus:
+    """Fan-out of published messages to any number of subscriptions."""
+
+    def __init__(self, cycle_budget=0.01):
+        """
+        Args:
+            cycle_budget (float): Total seconds blocking subscribers may hold up one
+                                  publish cycle, however many messages and subscribers it has.
+        """
+        self.subscriptions = []
+        self.lock = threading.Lock()
+        self.cycle_budget = cycle_budget
+
+    def subscribe(self, name, maxsize=1000, policy='drop_oldest', **kwargs):
+        """Create and register a new subscription."""
+        subscription = Subscription(name, maxsize=maxsize, policy=policy, **kwargs)
+        with self.lock:
+            # Copy-on-write so publish() can iterate without holding the lock
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop delivering messages to a subscription."""
+        with self.lock:
+            self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    def cycle_deadline(self):
+        """Deadline for a publish cycle starting now; pass it to every publish() of the cycle."""
+        return time.monotonic() + self.cycle_budget
+
+    def publish(self, message, deadline=None):
+        """
+        Deliver a message to every subscription.
+        Blocking subscribers wait at most until deadline (a cycle of its own by default);
+        once it has passed, full blocking subscribers drop their oldest message instead.
+        """
+        if deadline is None:
+            deadline = self.cycle_deadline()
+        for subscription in self.subscriptions:
+            subscription.put(message, deadline)
+
+    def get_stats(self):
+        """Return the counters of every subscription."""
+        return [subscription.get_stats() for subscription in self.subscriptions]
@@ -18,18 +18,21 @@ class EMGPlotter:
     Handles the visualization of processed EMG data.
     """
 
-    def __init__(self, num_sensors=16, sampling_rate=2000.0, data_queue=None):
+    def __init__(self, num_sensors=16, sampling_rate=2000.0, data_queue=None, ring_reader=None):
         """
         Initialize the EMG plotter.
         Args:
             num_sensors (int): Number of EMG sensors.
             sampling_rate (float): Expected sampling rate (used for buffer sizing).
-            data_queue (queue.Queue): Queue from which to receive processed data.
+            data_queue (queue.Queue): Queue or handler subscription from which to receive processed data.
                                       If None, a new queue is created.
+            ring_reader (RingReader): Reader on a handler's output ring. If given,
+                                      it is used instead of data_queue.
         """
         self.NUM_SENSORS = num_sensors
         self.SAMPLING_RATE = sampling_rate
         self.data_queue = data_queue if data_queue is not None else queue.Queue()
+        self.ring_reader = ring_reader
 
         # Circular buffers for processed EMG data (1 second window)
         self.buffer_size = int(self.SAMPLING_RATE * 1.0)
@@ -95,14 +98,27 @@ class EMGPlotter:
         print("🔄 Data consumer thread started")
         while self.animating: # Use animating flag for consistency
             try:
+                if self.ring_reader is not None:
+                    # Read every frame written since the last read
+                    frames, _ = self.ring_reader.read(timeout=0.1)
+                    for channel in range(min(self.NUM_SENSORS, frames.shape[1])):
+                        self.emg_buffers[channel].extend(frames[:, channel])
+                    continue
+
                 # Get processed data from the queue
                 processed_data = self.data_queue.get(timeout=0.1) # Timeout to allow checking flag
-                channel = processed_data['channel']
                 samples = processed_data['samples']
 
-                # Update the buffer for this channel
-                if channel in self.emg_buffers:
-                    self.emg_buffers[channel].extend(samples)
+                if 'channel' in processed_data:
+                    # Per-channel message: update the buffer for this channel
+                    channel = processed_data['channel']
+                    if channel in self.emg_buffers:
+                        self.emg_buffers[channel].extend(samples)
+                else:
+                    # Block message: one (channels, samples) array for all channels
+                    for channel, channel_samples in enumerate(samples):
+                        if channel in self.emg_buffers:
+                            self.emg_buffers[channel].extend(channel_samples)
 
             except queue.Empty:
                 continue # Check flag again
@@ -172,16 +188,12 @@ if __name__ == "__main__":
     NUM_SENSORS = 16
     SAMPLING_RATE = 2000.0
 
-    # Create shared queue
-    shared_queue = queue.Queue(maxsize=1000)
-
     # Create handler object
     handler = DelsysDataHandler(host_ip=HOST_IP, num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE)
-    # Override the handler's queue to use the shared one
-    handler.output_queue = shared_queue
 
-    # Create plotter object using the shared queue
-    plotter = EMGPlotter(num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE, data_queue=shared_queue)
+    # Create plotter object reading from the handler's output ring with its own cursor
+    plotter = EMGPlotter(num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE,
+                         ring_reader=handler.output_ring.reader())
 
     print("📊 Starting Delsys EMG Plotter...")
 
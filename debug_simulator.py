@@ -155,6 +155,8 @@ class DelsysSimulatorDebug:
                 client_socket, addr = self.comm_socket.accept()
                 print(f"✅ Command client connected from {addr}")
                 self.clients['comm'] = client_socket
+                # Like the Trigno server, greet with the protocol version
+                client_socket.send(b"Delsys Trigno System Digital Protocol Version 3.6.0 (simulated)\r\n\r\n")
                 
                 # Start command handling thread
                 cmd_thread = threading.Thread(target=self._handle_commands, args=(client_socket,), daemon=True)
@@ -189,12 +191,16 @@ class DelsysSimulatorDebug:
                         rate_value = command.split()[1]
                         self.sampling_rate = float(rate_value)
                         print(f"⚙️ Set sampling rate to: {self.sampling_rate}")
+                        client_socket.send(b"OK\r\n\r\n")
                     except:
                         print("❌ Invalid rate command format")
+                        client_socket.send(b"INVALID COMMAND\r\n\r\n")
                 elif "START" in command:
                     print("▶️ Start command received - streaming enabled")
+                    client_socket.send(b"OK\r\n\r\n")
                 elif "STOP" in command:
                     print("⏹️ Stop command received")
+                    client_socket.send(b"OK\r\n\r\n")
                     
         except Exception as e:
             print(f"❌ Command handling error: {e}")
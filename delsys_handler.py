@@ -3,14 +3,85 @@
 Handles connection to Delsys system, receives raw EMG data,
 performs signal processing, and provides processed data.
 """
+import asyncio
 import socket
-import struct
 import threading
 import time
 import numpy as np
-import queue
-from collections import deque
-from scipy.signal import butter, filtfilt, iirnotch
+from async_acquisition import AsyncDelsysClient
+from data_bus import DataBus
+from emg_filters import StreamingEMGFilter
+from ring_buffer import FrameRingBuffer
+from sample_clock import SampleClock
+
+
+class PacketReader:
+    """
+    Reads fixed-size packets from a stream socket into a preallocated buffer.
+    TCP may split or merge packets arbitrarily, so bytes are accumulated with
+    recv_into until at least one whole packet is available. Complete packets
+    are exposed as a float32 view over the buffer (no copies, no tuples) and
+    any trailing partial packet is carried over to the next read.
+    """
+
+    def __init__(self, sock, packet_bytes, max_packets=8):
+        """
+        Args:
+            sock (socket.socket): Connected stream socket.
+            packet_bytes (int): Size of one device packet in bytes.
+            max_packets (int): Number of packets the buffer can hold at once.
+        """
+        self.sock = sock
+        self.packet_bytes = packet_bytes
+        self.buffer = bytearray(packet_bytes * max_packets)
+        self.view = memoryview(self.buffer)
+        self.fill = 0        # Bytes currently held in the buffer
+        self.consumed = 0    # Bytes handed out by the last read_packets() call
+
+        # Counters
+        self.bytes_received = 0
+        self.packets_received = 0
+        self.recv_calls = 0
+        self.partial_reads = 0  # recv() calls that ended mid-packet
+
+    def read_packets(self):
+        """
+        Block until at least one whole packet is available.
+        Returns a float32 array viewing every complete packet in the buffer.
+        The view is only valid until the next call to read_packets().
+        """
+        # Move any partial packet left over from the last call to the front
+        if self.consumed:
+            remainder = self.fill - self.consumed
+            if remainder:
+                self.buffer[:remainder] = self.buffer[self.consumed:self.fill]
+            self.fill = remainder
+            self.consumed = 0
+
+        while self.fill < self.packet_bytes:
+            nbytes = self.sock.recv_into(self.view[self.fill:])
+            if nbytes == 0:
+                raise ConnectionError("Socket closed by remote host")
+            self.recv_calls += 1
+            self.bytes_received += nbytes
+            self.fill += nbytes
+            if self.fill % self.packet_bytes:
+                self.partial_reads += 1
+
+        num_packets = self.fill // self.packet_bytes
+        self.consumed = num_packets * self.packet_bytes
+        self.packets_received += num_packets
+        return np.frombuffer(self.buffer, dtype=np.float32, count=self.consumed // 4)
+
+    def get_stats(self):
+        """Return a dictionary of reader counters."""
+        return {
+            'bytes_received': self.bytes_received,
+            'packets_received': self.packets_received,
+            'recv_calls': self.recv_calls,
+            'partial_reads': self.partial_reads,
+            'pending_bytes': self.fill - self.consumed,
+        }
 
 
 class DelsysDataHandler:
@@ -24,33 +95,92 @@ class DelsysDataHandler:
         5. Envelope extraction via low-pass filtering
     """
 
-    def __init__(self, host_ip='localhost', num_sensors=16, sampling_rate=2000.0, envelope=False, comm_port=50040, emg_port=50041):
+    DEFAULT_MUSCLE_LABELS = [
+        'L-TIBI', 'L-GAST', 'L-RECT-DIST', 'L-RECT-PROX', 'L-VAST-LATE',
+        'R-TIBI', 'R-GAST', 'R-RECT-DIST', 'R-RECT-PROX', 'R-VAST-LATE',
+        'L-SEMI', 'R-SEMI', 'NC', 'NC', 'L-BICEP-FEMO', 'R-BICEP-FEMO'
+    ]
+
+    def __init__(self, host_ip='localhost', num_sensors=16, sampling_rate=2000.0, envelope=False, comm_port=50040, emg_port=50041,
+                 batch_processing=True, output_format='channel', output_ring=None, acquisition='threads',
+                 acc_port=50042, enable_acc=False, sample_clock=None, output_ring_seconds=10.0,
+                 output_queue=False):
         """
         Initialize the Delsys data handler with configuration parameters.
+        If batch_processing is True, all channels are filtered in one call per
+        block; otherwise each channel is filtered separately.
+        output_format selects the messages published to subscribers:
+            'channel': one {'channel', 'muscle_label', 'samples'} dict per channel per block
+            'block':   one {'sequence', 'sample_index', 'timestamp', 'samples', 'muscle_labels'}
+                       dict per block, where 'samples' is a contiguous (channels, samples)
+                       float32 array, 'sample_index' is the device index of its first sample
+                       and 'timestamp' is that sample's estimated host (epoch) time
+        output_ring optionally supplies a preallocated FrameRingBuffer (e.g. in shared
+        memory) for processed frames; by default an output_ring_seconds long ring is created.
+        acquisition selects how the sockets are read:
+            'threads': blocking sockets with one reader thread per stream
+            'asyncio': command, EMG and (if enable_acc) ACC ports on one event loop
+                       running in a single background thread
+        sample_clock optionally supplies the SampleClock that maps device sample
+        indices to host time (e.g. one whose state lives in shared memory).
+        If output_queue is True, a default subscriber is created as self.output_queue;
+        otherwise no messages are built until something subscribes.
         """
         # Configuration parameters
         self.HOST_IP = host_ip
         self.NUM_SENSORS = num_sensors
         self.envelope = envelope
+        self.batch_processing = batch_processing
+        if output_format not in ('channel', 'block'):
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.output_format = output_format
+        if acquisition not in ('threads', 'asyncio'):
+            raise ValueError(f"Unknown acquisition mode: {acquisition}")
+        self.acquisition = acquisition
         self.comm_port = comm_port
         self.emg_port = emg_port
+        self.acc_port = acc_port
+        self.enable_acc = enable_acc
         self.SAMPLING_RATE = sampling_rate
-        self.muscle_labels = [
-            'L-TIBI', 'L-GAST', 'L-RECT-DIST', 'L-RECT-PROX', 'L-VAST-LATE',
-            'R-TIBI', 'R-GAST', 'R-RECT-DIST', 'R-RECT-PROX', 'R-VAST-LATE',
-            'L-SEMI', 'R-SEMI', 'NC', 'NC', 'L-BICEP-FEMO', 'R-BICEP-FEMO'
-        ]
+        self.muscle_labels = list(self.DEFAULT_MUSCLE_LABELS)
 
         # Network connections
         self.comm_socket = None
         self.emg_socket = None
-
-        # Thread-safe queue for processed data output
-        self.output_queue = queue.Queue(maxsize=1000)
-
-        # Buffers to accumulate samples before applying filters
+        self.packet_reader = None
+        self.async_client = None
+        self.async_loop = None
+
+        # Publish/subscribe bus for processed data; output_queue is an opt-in default subscriber
+        self.bus = DataBus()
+        self.output_queue = None
+        if output_queue:
+            self.output_queue = self.bus.subscribe('default', maxsize=1000, policy='drop_oldest')
+
+        # Ring buffer of processed (samples, channels) frames for lock-free consumers.
+        # Its write cursor equals the device sample index of the next processed frame.
+        self.OUTPUT_RING_SECONDS = output_ring_seconds
+        if output_ring is None:
+            output_ring = FrameRingBuffer(capacity=int(self.SAMPLING_RATE * self.OUTPUT_RING_SECONDS),
+                                          channels=self.NUM_SENSORS)
+        self.output_ring = output_ring
+
+        # Device sample index (samples received per channel) and its mapping to host time
+        self.device_sample_index = 0
+        self.sample_clock = sample_clock if sample_clock is not None else SampleClock(self.SAMPLING_RATE)
+
+        # Raw accelerometer frames (16 sensors x 3 axes), only read in asyncio mode
+        self.ACC_SAMPLING_RATE = 148.148
+        self.acc_ring = None
+        if enable_acc:
+            self.acc_ring = FrameRingBuffer(capacity=int(self.ACC_SAMPLING_RATE * self.OUTPUT_RING_SECONDS),
+                                            channels=self.NUM_SENSORS * 3)
+
+        # Ring buffer of (samples, channels) frames accumulated before applying filters
         self.ACCUMULATION_SIZE = 75
-        self.emg_processing_buffers = [deque(maxlen=self.ACCUMULATION_SIZE) for _ in range(self.NUM_SENSORS)]
+        self.emg_processing_buffer = FrameRingBuffer(capacity=self.ACCUMULATION_SIZE * 32, channels=self.NUM_SENSORS)
+        self.processing_cursor = 0
+        self.block_sequence = 0
 
         # Threading control
         self.streaming = False
@@ -63,46 +193,26 @@ class DelsysDataHandler:
         self._design_filters()
 
     def _design_filters(self):
-        """Pre-calculate filter coefficients for efficiency."""
-        fs = self.SAMPLING_RATE
-        # 1. DC Offset Removal (High-pass)
-        hp_cutoff = 0.5
-        hp_order = 2
-        self.hp_b, self.hp_a = butter(hp_order, hp_cutoff / (0.5 * fs), btype='high')
-        # 2. Notch Filter (60 Hz)
-        notch_freq = 60.0
-        quality_factor = 30.0
-        self.notch_b, self.notch_a = iirnotch(notch_freq / (0.5 * fs), quality_factor)
-        # 3. Band-pass Filter (20-450 Hz)
-        bp_low = 20.0
-        bp_high = 450.0
-        bp_order = 4
-        self.bp_b, self.bp_a = butter(bp_order, [bp_low / (0.5 * fs), bp_high / (0.5 * fs)], btype='band')
-        # 4. Envelope Extraction (Low-pass after rectification)
-        lp_cutoff = 10.0
-        lp_order = 2
-        self.lp_b, self.lp_a = butter(lp_order, lp_cutoff / (0.5 * fs), btype='low')
+        """Pre-calculate filter coefficients and create the streaming filter state."""
+        # High-pass (0.5 Hz), 60 Hz notch and 20-450 Hz band-pass as one SOS cascade,
+        # plus the 10 Hz envelope low-pass applied after rectification
+        self.filter_engine = StreamingEMGFilter(self.SAMPLING_RATE, self.NUM_SENSORS, envelope=self.envelope)
         print("✅ Filter coefficients designed.")
 
-    def process_emg_channel(self, data):
+    def process_emg_channel(self, data, channel):
         """
         Apply the sequence of signal processing steps to a single EMG channel.
-        Assumes data is a 1D numpy array.
+        Assumes data is a 1D numpy array holding the next chunk for this channel;
+        filter state is carried over from the channel's previous chunk.
+        """
+        return self.filter_engine.process_channel(channel, data)
+
+    def process_emg_block(self, block):
+        """
+        Apply the signal processing steps to all channels at once.
+        Assumes block is a (channels, samples) numpy array.
         """
-        # Make a copy to avoid modifying the original data
-        processed_data = np.copy(data)
-        # 1. DC offset removal (High-pass filter)
-        processed_data = filtfilt(self.hp_b, self.hp_a, processed_data)
-        # 2. Notch filter (60 Hz powerline interference)
-        processed_data = filtfilt(self.notch_b, self.notch_a, processed_data)
-        # 3. Band-pass filter (20-450 Hz for EMG frequency range)
-        processed_data = filtfilt(self.bp_b, self.bp_a, processed_data)
-        # 4. Full-wave rectification
-        processed_data = np.abs(processed_data)
-        # 5. Envelope extraction via low-pass filtering
-        if self.envelope:
-            processed_data = filtfilt(self.lp_b, self.lp_a, processed_data)
-        return processed_data
+        return self.filter_engine.process_block(block)
 
     def setup_connections(self):
         """Establish TCP connections to Delsys system"""
@@ -158,21 +268,7 @@ class DelsysDataHandler:
                 return False
             try:
                 response = self.comm_socket.recv(1024).decode().strip()
-                print(f"📊 Sampling rate response: {response}")
-                # Adjust parameters based on response
-                if '1925' in response:
-                    self.rate_adjusted_bytes = 1664
-                    actual_rate = 1925.926
-                else:
-                    self.rate_adjusted_bytes = 1728
-                    actual_rate = 2000.0
-                # Update sampling rate and buffers if rate differs
-                if actual_rate != self.SAMPLING_RATE:
-                    print(f"⚠️  Actual rate {actual_rate}Hz differs from requested {self.SAMPLING_RATE}Hz. Updating...")
-                    self.SAMPLING_RATE = actual_rate
-                    self._design_filters() # Re-design filters with new rate
-
-                print(f"✅ Packet size: {self.rate_adjusted_bytes} bytes")
+                self._apply_rate_response(response)
                 return True
             except Exception as e:
                 print(f"❌ Rate query error: {e}")
@@ -181,19 +277,35 @@ class DelsysDataHandler:
             print(f"❌ Configuration error: {e}")
             return False
 
+    def _apply_rate_response(self, response):
+        """Update packet size, sampling rate and filters from the RATE? reply."""
+        print(f"📊 Sampling rate response: {response}")
+        # Adjust parameters based on response
+        if '1925' in response:
+            self.rate_adjusted_bytes = 1664
+            actual_rate = 1925.926
+        else:
+            self.rate_adjusted_bytes = 1728
+            actual_rate = 2000.0
+        # Update sampling rate and buffers if rate differs
+        if actual_rate != self.SAMPLING_RATE:
+            print(f"⚠️  Actual rate {actual_rate}Hz differs from requested {self.SAMPLING_RATE}Hz. Updating...")
+            self.SAMPLING_RATE = actual_rate
+            self._design_filters() # Re-design filters with new rate
+            self.sample_clock.reset(self.SAMPLING_RATE)
+
+        print(f"✅ Packet size: {self.rate_adjusted_bytes} bytes")
+
     def emg_data_thread(self):
         """Thread function for reading EMG data"""
         print("🔄 EMG data thread started")
+        self.packet_reader = PacketReader(self.emg_socket, self.rate_adjusted_bytes)
         while self.streaming:
             try:
-                # Read EMG data
-                data_bytes = self.emg_socket.recv(self.rate_adjusted_bytes)
-                if len(data_bytes) == self.rate_adjusted_bytes:
-                    # Convert bytes to float32 array
-                    samples = struct.unpack(f'{len(data_bytes)//4}f', data_bytes)
-                    samples_array = np.array(samples)
-                    # Add to processing buffer
-                    self._process_raw_data(samples_array)
+                # Read one or more whole EMG packets as a float32 view
+                samples_array = self.packet_reader.read_packets()
+                # Add to processing buffer
+                self._process_raw_data(samples_array)
             except socket.error as e:
                 if self.streaming:
                     print(f"❌ EMG socket error: {e}")
@@ -202,58 +314,111 @@ class DelsysDataHandler:
                 if self.streaming:
                     print(f"❌ EMG thread error: {e}")
                 break
-        print("🔄 EMG thread stopped")
+        self._end_stream()
+        stats = self.packet_reader.get_stats()
+        print(f"🔄 EMG thread stopped ({stats['packets_received']} packets, {stats['partial_reads']} partial reads)")
 
     def _process_raw_data(self, raw_data_chunk):
         """Accumulate and process raw data chunks, then put processed data in output queue."""
         try:
-            # Demultiplex data and accumulate
-            for channel in range(self.NUM_SENSORS):
-                # Get data for this specific channel from the packet
-                channel_data = raw_data_chunk[channel::self.NUM_SENSORS]
-                # Add these samples to the processing buffer for this channel
-                self.emg_processing_buffers[channel].extend(channel_data)
-
-                # Check if we have enough data accumulated to process
-                if len(self.emg_processing_buffers[channel]) >= self.ACCUMULATION_SIZE:
-                    # Convert accumulated data to numpy array for processing
-                    accumulated_data = np.array(self.emg_processing_buffers[channel])
-                    # Apply signal processing to the accumulated chunk
-                    processed_channel_data = self.process_emg_channel(accumulated_data)
-
+            # Demultiplex the whole chunk at once into (samples, channels) frames
+            frames = raw_data_chunk.reshape(-1, self.NUM_SENSORS)
+            self.emg_processing_buffer.write(frames)
+
+            # Log the arrival of these samples against the host monotonic clock
+            self.device_sample_index += frames.shape[0]
+            self.sample_clock.update(self.device_sample_index, time.monotonic())
+
+            # Process every complete block of ACCUMULATION_SIZE frames
+            while self.emg_processing_buffer.write_cursor - self.processing_cursor >= self.ACCUMULATION_SIZE:
+                block = self.emg_processing_buffer.read(self.processing_cursor, self.ACCUMULATION_SIZE)
+                block_sample_index = self.processing_cursor
+                self.processing_cursor += self.ACCUMULATION_SIZE
+
+                if self.batch_processing:
+                    processed_block = self.process_emg_block(block.T)
+                else:
+                    processed_block = np.vstack([self.process_emg_channel(block[:, channel], channel)
+                                                 for channel in range(self.NUM_SENSORS)])
+
+                # Publish to the ring buffer first so readers see every block
+                self.output_ring.write(processed_block.T)
+                if not self.bus.subscriptions:
+                    # Nobody to deliver messages to; ring readers already have the block
+                    self.block_sequence += 1
+                    continue
+                # One deadline for all of this block's messages, so blocking subscribers
+                # can hold up acquisition for at most the bus's cycle budget per block
+                deadline = self.bus.cycle_deadline()
+
+                if self.output_format == 'block':
+                    # One message carrying every channel of this block, shared by all
+                    # subscribers and therefore read-only
+                    samples = processed_block.astype(np.float32)
+                    samples.flags.writeable = False
+                    self._put_output({
+                        'sequence': self.block_sequence,
+                        'sample_index': block_sample_index,
+                        'timestamp': float(self.sample_clock.time_of(block_sample_index, wall=True)),
+                        'samples': samples,
+                        'muscle_labels': self.muscle_labels
+                    }, deadline)
+                    self.block_sequence += 1
+                    continue
+
+                processed_block.flags.writeable = False
+                for channel in range(self.NUM_SENSORS):
                     # Package data for output (channel id and processed samples)
-                    output_data = {
+                    self._put_output({
                         'channel': channel,
                         'muscle_label': self.muscle_labels[channel],
-                        'samples': processed_channel_data
-                    }
-
-                    # Add to output queue
-                    try:
-                        self.output_queue.put_nowait(output_data)
-                    except queue.Full:
-                        # Remove old data if queue is full
-                        try:
-                            self.output_queue.get_nowait()
-                            self.output_queue.put_nowait(output_data)
-                        except queue.Empty:
-                            pass
-
-                    # Clear the processing buffer for this channel
-                    self.emg_processing_buffers[channel].clear()
+                        'samples': processed_block[channel]
+                    }, deadline)
 
         except Exception as e:
              if self.streaming:
                  print(f"❌ Internal processing error: {e}")
 
+    def _put_output(self, output_data, deadline=None):
+        """Publish a message to every subscriber according to its backpressure policy."""
+        self.bus.publish(output_data, deadline)
+
+    def subscribe(self, name, maxsize=1000, policy='drop_oldest', **kwargs):
+        """
+        Register a new consumer of processed data messages.
+        Each subscriber gets its own bounded buffer; see data_bus.Subscription
+        for the available backpressure policies.
+        """
+        return self.bus.subscribe(name, maxsize=maxsize, policy=policy, **kwargs)
+
+    def unsubscribe(self, subscription):
+        """Stop delivering messages to a subscriber."""
+        self.bus.unsubscribe(subscription)
+
     def clear_processing_buffers(self):
         """Clear the temporary processing buffers."""
-        for buffer in self.emg_processing_buffers:
-            buffer.clear()
+        self.output_ring.clear()
+        self.emg_processing_buffer.clear()
+        self.processing_cursor = 0
+        self.block_sequence = 0
+        self.device_sample_index = 0
+        self.sample_clock.reset(self.SAMPLING_RATE)
+        self.filter_engine.reset()
 
     def start_streaming(self):
         """Start data acquisition and processing"""
         print("🚀 Starting streaming...")
+        start = time.perf_counter()
+        if self.acquisition == 'asyncio':
+            started = self._start_async_streaming()
+        else:
+            started = self._start_thread_streaming()
+        if started:
+            print(f"✅ Streaming started in {time.perf_counter() - start:.3f} s ({threading.active_count()} threads)")
+        return started
+
+    def _start_thread_streaming(self):
+        """Connect and configure with blocking sockets, then start one reader thread."""
         if not self.setup_connections():
             return False
         if not self.configure_system():
@@ -275,16 +440,89 @@ class DelsysDataHandler:
 
         return True
 
-    def stop_streaming(self):
-        """Stop data acquisition"""
+    def _start_async_streaming(self):
+        """Run the asyncio acquisition core in one background thread."""
+        ready = threading.Event()
+        self.streaming = True
+        self.async_started = False
+        self.threads = [
+            threading.Thread(target=self.async_acquisition_thread, args=(ready,), daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+        ready.wait(timeout=30.0)
+        if not self.async_started:
+            self.streaming = False
+        return self.async_started
+
+    def async_acquisition_thread(self, ready):
+        """Thread function running the asyncio event loop for all sockets"""
+        print("🔄 Acquisition event loop started")
+        asyncio.run(self._async_acquisition(ready))
+        print("🔄 Acquisition event loop stopped")
+
+    async def _async_acquisition(self, ready):
+        """Connect, configure and stream on the event loop."""
+        self.async_loop = asyncio.get_running_loop()
+        self.async_client = AsyncDelsysClient(
+            host_ip=self.HOST_IP, comm_port=self.comm_port, emg_port=self.emg_port, acc_port=self.acc_port,
+            on_emg=self._process_raw_data, on_acc=self._process_acc_data if self.enable_acc else None)
+        self.async_client.stop_event = asyncio.Event()
+        try:
+            await self.async_client.connect()
+            print("⚙️ Configuring system...")
+            await self.async_client.send_command(f"RATE {int(self.SAMPLING_RATE)}")
+            response = await self.async_client.send_command("RATE?")
+            if response is None:
+                print("❌ Rate query error: no reply")
+                return
+            self._apply_rate_response(response)
+            self.async_client.emg_packet_bytes = self.rate_adjusted_bytes
+            reply = await self.async_client.send_command("START")
+            print(f"▶️ START command sent ({reply})")
+            self.async_started = True
+            ready.set()
+            await self.async_client.stream()
+        except Exception as e:
+            if self.streaming:
+                print(f"❌ Acquisition error: {e}")
+        finally:
+            self._end_stream()
+            ready.set()
+            await self.async_client.close()
+
+    def _end_stream(self):
+        """Mark the stream as ended (stopped or dropped by the device) and wake the ring's readers."""
+        self.streaming = False
+        self.output_ring.wake()
+
+    def is_alive(self):
+        """True while streaming and the acquisition thread is still running."""
+        return self.streaming and any(thread.is_alive() for thread in self.threads)
+
+    def _process_acc_data(self, raw_data_chunk):
+        """Store raw accelerometer packets as (samples, sensors x axes) frames."""
+        self.acc_ring.write(raw_data_chunk.reshape(-1, self.NUM_SENSORS * 3))
+
+    def stop_streaming(self, clear_buffers=True):
+        """Stop data acquisition; clear_buffers=False keeps the output ring and clock as they are."""
         print("🛑 Stopping streaming...")
-        self.clear_processing_buffers()
         self.streaming = False
+        if self.async_loop is not None and self.async_client is not None:
+            try:
+                self.async_loop.call_soon_threadsafe(self.async_client.stop)
+            except RuntimeError:
+                pass  # Event loop already closed
         # Wait for threads to finish
         for thread in self.threads:
             if thread.is_alive():
                 thread.join(timeout=2.0)
         self.cleanup_connections()
+        # The ring cursor and clock are only reset once nothing can write them any more
+        if any(thread.is_alive() for thread in self.threads):
+            print("⚠️  Data thread did not stop; processing buffers left as they are")
+        elif clear_buffers:
+            self.clear_processing_buffers()
 
     def cleanup_connections(self):
         """Close all network connections"""
@@ -299,6 +537,7 @@ class DelsysDataHandler:
 
 # Example usage if run directly (for testing data handler)
 if __name__ == "__main__":
+    import queue
     import signal
     import sys
 
@@ -315,7 +554,8 @@ if __name__ == "__main__":
     SAMPLING_RATE = 2000.0
 
     # Create handler object
-    handler = DelsysDataHandler(host_ip=HOST_IP, num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE)
+    handler = DelsysDataHandler(host_ip=HOST_IP, num_sensors=NUM_SENSORS, sampling_rate=SAMPLING_RATE,
+                                output_queue=True)
     print("🔌 Starting Delsys EMG Data Handler...")
 
     try:
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Causal streaming EMG filter engine.
+Combines the DC offset high-pass, 60 Hz notch and 20-450 Hz band-pass into a
+single second-order-section cascade, followed by full-wave rectification and
+an optional envelope low-pass. Filter state is kept per channel between
+chunks so each sample is filtered exactly once and the output is continuous
+across chunk boundaries.
+"""
+import numpy as np
+
+# Envelope low-pass cutoff in Hz
+ENVELOPE_CUTOFF = 10.0
+
+
+def _scipy_signal():
+    """scipy.signal, which is slow to import; load it only once a filter is built."""
+    import scipy.signal
+    return scipy.signal
+
+
+def envelope_sos(sampling_rate, cutoff=ENVELOPE_CUTOFF):
+    """Envelope low-pass (2nd-order Butterworth) as SOS, with its unit-step initial conditions."""
+    signal = _scipy_signal()
+    sos = signal.butter(2, cutoff / (0.5 * sampling_rate), btype='low', output='sos')
+    return sos, signal.sosfilt_zi(sos)
+
+
+class StreamingEMGFilter:
+    """
+    Stateful multi-channel EMG filter.
+    State arrays have shape (n_sections, channels, 2) so a single channel's
+    state is the slice [:, channel, :].
+    """
+
+    def __init__(self, sampling_rate, num_channels, envelope=False):
+        """
+        Args:
+            sampling_rate (float): Sampling rate in Hz.
+            num_channels (int): Number of channels to keep state for.
+            envelope (bool): Apply the envelope low-pass after rectification.
+        """
+        self.SAMPLING_RATE = sampling_rate
+        self.num_channels = num_channels
+        self.envelope = envelope
+        self._design()
+        self.reset()
+
+    def _design(self):
+        """Design the SOS cascades."""
+        signal = _scipy_signal()
+        self._sosfilt = signal.sosfilt
+        fs = self.SAMPLING_RATE
+        # 1. DC Offset Removal (High-pass)
+        hp_sos = signal.butter(2, 0.5 / (0.5 * fs), btype='high', output='sos')
+        # 2. Notch Filter (60 Hz)
+        notch_b, notch_a = signal.iirnotch(60.0 / (0.5 * fs), 30.0)
+        notch_sos = signal.tf2sos(notch_b, notch_a)
+        # 3. Band-pass Filter (20-450 Hz)
+        bp_sos = signal.butter(4, [20.0 / (0.5 * fs), 450.0 / (0.5 * fs)], btype='band', output='sos')
+        # Linear stages before rectification run as one cascade
+        self.sos = np.vstack((hp_sos, notch_sos, bp_sos))
+        # Unit-step initial conditions, scaled by the first sample of each channel
+        self.sos_zi = signal.sosfilt_zi(self.sos)
+        # 5. Envelope Extraction (Low-pass after rectification)
+        self.lp_sos, self.lp_sos_zi = envelope_sos(fs)
+
+    def reset(self):
+        """Forget all filter state; the next chunk re-primes each channel."""
+        self.zi = np.zeros((self.sos.shape[0], self.num_channels, 2))
+        self.lp_zi = np.zeros((self.lp_sos.shape[0], self.num_channels, 2))
+        self.primed = np.zeros(self.num_channels, dtype=bool)
+
+    def process_channel(self, channel, data):
+        """
+        Filter one chunk of a single channel, continuing from its previous state.
+        Returns the filtered (and rectified) samples as a float64 array.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if not self.primed[channel]:
+            # Start in steady state for the first sample to avoid a DC step transient
+            self.zi[:, channel, :] = self.sos_zi * data[0]
+        processed_data, self.zi[:, channel, :] = self._sosfilt(self.sos, data, zi=self.zi[:, channel, :])
+        # 4. Full-wave rectification
+        processed_data = np.abs(processed_data)
+        if self.envelope:
+            if not self.primed[channel]:
+                self.lp_zi[:, channel, :] = self.lp_sos_zi * processed_data[0]
+            processed_data, self.lp_zi[:, channel, :] = self._sosfilt(self.lp_sos, processed_data, zi=self.lp_zi[:, channel, :])
+        self.primed[channel] = True
+        return processed_data
+
+    def process_block(self, block):
+        """
+        Filter a (channels, samples) block for all channels in one vectorized call
+        along the time axis, continuing from each channel's previous state.
+        Returns the filtered (and rectified) block as a float64 array.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        unprimed = ~self.primed
+        if unprimed.any():
+            self.zi[:, unprimed, :] = self.sos_zi[:, np.newaxis, :] * block[unprimed, 0][np.newaxis, :, np.newaxis]
+        processed_block, self.zi = self._sosfilt(self.sos, block, axis=-1, zi=self.zi)
+        # 4. Full-wave rectification
+        processed_block = np.abs(processed_block)
+        if self.envelope:
+            if unprimed.any():
+                self.lp_zi[:, unprimed, :] = self.lp_sos_zi[:, np.newaxis, :] * processed_block[unprimed, 0][np.newaxis, :, np.newaxis]
+            processed_block, self.lp_zi = self._sosfilt(self.lp_sos, processed_block, axis=-1, zi=self.lp_zi)
+        self.primed[:] = True
+        return processed_block
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Binary framing for the live view.
+A live frame is a fixed little-endian header followed by float32 samples,
+channel-major, so the browser can wrap each channel in a Float32Array without
+parsing or copying:
+
+    offset 0   4s   magic b'EMGL'
+    offset 4   u16  channel count
+    offset 6   u16  flags (LIVE_FLAG_RESYNC: the frame replaces what the client holds;
+                          LIVE_FLAG_DECIMATED: samples are min/max pairs, see decimate_minmax)
+    offset 8   u32  samples per channel
+    offset 12  u64  sequence: device sample index of the first sample
+    offset 20  f32  samples[channel][sample]
+"""
+import struct
+import threading
+import numpy as np
+
+LIVE_FRAME_MAGIC = b'EMGL'
+LIVE_FRAME_HEADER = struct.Struct('<4sHHIQ')
+LIVE_FRAME_MIMETYPE = 'application/octet-stream'
+LIVE_FLAG_RESYNC = 1
+LIVE_FLAG_DECIMATED = 2
+
+
+def pack_live_frame(frames, sequence, flags=0):
+    """Pack (samples, channels) frames whose first sample has index sequence into a live frame."""
+    num_samples, num_channels = frames.shape
+    header = LIVE_FRAME_HEADER.pack(LIVE_FRAME_MAGIC, num_channels, flags, num_samples, sequence)
+    return header + np.ascontiguousarray(frames.T, dtype=np.float32).tobytes()
+
+
+def unpack_live_frame(payload):
+    """Inverse of pack_live_frame; returns (samples (channels, samples), sequence, flags)."""
+    magic, num_channels, flags, num_samples, sequence = LIVE_FRAME_HEADER.unpack_from(payload)
+    if magic != LIVE_FRAME_MAGIC:
+        raise ValueError("Not a live frame")
+    samples = np.frombuffer(payload, dtype=np.float32, count=num_channels * num_samples,
+                            offset=LIVE_FRAME_HEADER.size).reshape(num_channels, num_samples)
+    return samples, sequence, flags
+
+
+def live_window(ring, since, window):
+    """
+    Samples a live client has not seen yet.
+    since is the sequence the client expects next (None on its first poll).
+    Returns (frames, sequence, resync): only the frames from since onwards, or
+    with resync set, the newest `window` frames when the client is new, has
+    fallen more than `window` frames behind, or the ring was restarted.
+    """
+    write_cursor = ring.write_cursor
+    if since is None or since > write_cursor or since < write_cursor - window:
+        frames, start = ring.latest(window)
+        return frames, start, True
+    return np.array(ring.read(since, write_cursor - since)), since, False
+
+
+def decimate_minmax(frames, points):
+    """
+    Peak-preserving decimation of (samples, channels) frames to about `points` samples.
+    The samples are split into points // 2 equal buckets (the oldest remainder is
+    dropped) and each bucket is replaced by its minimum and maximum, in the order they
+    occur, so spikes survive at any decimation factor.
+    Returns (decimated frames, number of leading samples dropped, samples per bucket).
+    """
+    num_samples, num_channels = frames.shape
+    buckets = max(1, points // 2)
+    if num_samples <= points or num_samples < buckets:
+        return frames, 0, 1
+    bucket_size = num_samples // buckets
+    dropped = num_samples - buckets * bucket_size
+    blocks = frames[dropped:].reshape(buckets, bucket_size, num_channels)
+    argmin = blocks.argmin(axis=1)
+    argmax = blocks.argmax(axis=1)
+    minima = np.take_along_axis(blocks, argmin[:, None, :], axis=1)[:, 0, :]
+    maxima = np.take_along_axis(blocks, argmax[:, None, :], axis=1)[:, 0, :]
+    min_first = argmin <= argmax
+    decimated = np.empty((2 * buckets, num_channels), dtype=frames.dtype)
+    decimated[0::2] = np.where(min_first, minima, maxima)
+    decimated[1::2] = np.where(min_first, maxima, minima)
+    return decimated, dropped, bucket_size
+
+
+class LiveSnapshotCache:
+    """
+    Serialized live responses shared by every viewer.
+    A snapshot is keyed by the ring's write cursor (plus the query), so it is
+    built once per producer update and then served as immutable bytes to any
+    number of concurrent requests. Only one request builds a missing snapshot;
+    the others wait for it instead of building their own copy.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.snapshots = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """Return the snapshot for key, calling build() to create it if needed."""
+        snapshot = self.snapshots.get(key)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        with self.lock:
+            snapshot = self.snapshots.get(key)
+            if snapshot is None:
+                self.misses += 1
+                snapshot = build()
+                if len(self.snapshots) >= self.max_entries:
+                    # Older cursors are never asked for again once the producer moves on
+                    self.snapshots = {}
+                # Copy-on-write so get() can read without the lock
+                self.snapshots = {**self.snapshots, key: snapshot}
+            else:
+                self.hits += 1
+        return snapshot
+
+    def clear(self):
+        """Drop every snapshot."""
+        with self.lock:
+            self.snapshots = {}
+
+    def get_stats(self):
+        """Return a dictionary of cache counters."""
+        return {'entries': len(self.snapshots), 'hits': self.hits, 'misses': self.misses}
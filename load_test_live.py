@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Load test for the live view.
+Polls a running app's live endpoint from an increasing number of concurrent
+clients, the way dashboards do, and reports request rate, latency and the
+server's CPU use. Each producer update is serialized once, but every poll is
+still a full HTTP request, so polling CPU grows with the number of clients.
+With --endpoint /live_stream the clients subscribe to server-sent events
+instead: each block is encoded once and the same bytes are written to every
+client, which is what keeps server CPU roughly flat as clients are added.
+The latency columns are then the gaps between consecutive events. The app
+allows threads // 2 open streams and refuses the rest with 503, so to stream
+from N clients start it with 'threads' of at least 2 * N (e.g. EMG_THREADS=128);
+refused streams are reported and the level is marked as not measured.
+
+Usage: python load_test_live.py --pid SERVER_PID [--url http://localhost:5000]
+                                [--endpoint /live_data.bin | /live_stream] [--start]
+"""
+import argparse
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+
+CLIENT_COUNTS = [1, 5, 10, 25, 50]
+DURATION = 5.0           # Seconds spent at each client count
+POLL_INTERVAL = 0.1      # Seconds between polls of one client (the page's LIVE_DATA_INTERVAL)
+
+
+def process_cpu_seconds(pid):
+    """User + system CPU seconds used so far by a process, or None if unavailable."""
+    try:
+        import psutil
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    except ImportError:
+        pass
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def poll_client(url, deadline, latencies, errors, refused):
+    """One dashboard: poll url every POLL_INTERVAL seconds until deadline."""
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start)
+        except urllib.error.HTTPError as e:
+            (refused if e.code == 503 else errors).append(1)
+        except OSError:
+            errors.append(1)
+        time.sleep(max(0.0, POLL_INTERVAL - (time.perf_counter() - start)))
+
+
+def stream_client(url, deadline, latencies, errors, refused):
+    """One live page on server-sent events: record the gap before each event until deadline."""
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            last = time.perf_counter()
+            while time.monotonic() < deadline:
+                line = response.readline()
+                if not line or line.startswith(b'event: end'):
+                    break
+                if line.startswith(b'data: '):
+                    now = time.perf_counter()
+                    latencies.append(now - last)
+                    last = now
+    except urllib.error.HTTPError as e:
+        (refused if e.code == 503 else errors).append(1)
+    except OSError:
+        errors.append(1)
+
+
+def run_level(url, num_clients, pid, duration=DURATION):
+    """Run num_clients pollers (or stream clients) for `duration` seconds and return timing figures."""
+    latencies, errors, refused = [], [], []
+    client = stream_client if url.split('?')[0].endswith('/live_stream') else poll_client
+    deadline = time.monotonic() + duration
+    cpu_start = process_cpu_seconds(pid) if pid else None
+    wall_start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(url, deadline, latencies, errors, refused), daemon=True)
+               for _ in range(num_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu_end = process_cpu_seconds(pid) if pid else None
+
+    result = {
+        'requests_per_s': len(latencies) / wall,
+        'mean_latency_ms': np.mean(latencies) * 1e3 if latencies else float('nan'),
+        'p95_latency_ms': np.percentile(latencies, 95) * 1e3 if latencies else float('nan'),
+        'errors': len(errors),
+        'refused': len(refused),
+        'server_cpu_pct': float('nan'),
+        'cpu_per_request_us': float('nan'),
+    }
+    if cpu_start is not None and cpu_end is not None:
+        cpu = cpu_end - cpu_start
+        result['server_cpu_pct'] = cpu / wall * 100
+        result['cpu_per_request_us'] = cpu / max(1, len(latencies)) * 1e6
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the live data endpoint with many polling clients.")
+    parser.add_argument('--url', default='http://localhost:5000', help="Base URL of the running app")
+    parser.add_argument('--endpoint', default='/live_data.bin', help="Live endpoint (and query) to poll")
+    parser.add_argument('--pid', type=int, default=None, help="Server process id, to measure its CPU")
+    parser.add_argument('--clients', default=','.join(map(str, CLIENT_COUNTS)), help="Comma-separated client counts")
+    parser.add_argument('--duration', type=float, default=DURATION, help="Seconds per client count")
+    parser.add_argument('--start', action='store_true', help="Start a recording first and stop it afterwards")
+    args = parser.parse_args()
+
+    url = args.url.rstrip('/') + args.endpoint
+    if args.start:
+        urllib.request.urlopen(urllib.request.Request(args.url.rstrip('/') + '/start_recording', method='POST'))
+        time.sleep(1.0)
+    if args.pid is None:
+        print("⚠️  No --pid given; server CPU will not be measured")
+
+    if url.split('?')[0].endswith('/live_stream'):
+        print(f"Streaming {url} for {args.duration:.0f} s per level (Req/s counts events)\n")
+    else:
+        print(f"Polling {url} every {POLL_INTERVAL * 1e3:.0f} ms per client for {args.duration:.0f} s per level\n")
+    print(f"{'Clients':>8} {'Req/s':>8} {'Mean ms':>9} {'p95 ms':>8} {'Errors':>7} {'CPU %':>7} {'CPU/req us':>11}")
+    try:
+        for num_clients in [int(count) for count in args.clients.split(',')]:
+            r = run_level(url, num_clients, args.pid, args.duration)
+            print(f"{num_clients:>8} {r['requests_per_s']:>8.1f} {r['mean_latency_ms']:>9.2f} "
+                  f"{r['p95_latency_ms']:>8.2f} {r['errors']:>7} {r['server_cpu_pct']:>7.1f} "
+                  f"{r['cpu_per_request_us']:>11.0f}")
+            if r['refused']:
+                # The figures above cover fewer clients than requested, so they are not this level's
+                print(f"⚠️  {r['refused']} requests from {num_clients} clients were refused with 503 (the server's live "
+                      f"stream limit is its 'threads' setting // 2); this level was NOT measured")
+    finally:
+        if args.start:
+            urllib.request.urlopen(urllib.request.Request(args.url.rstrip('/') + '/stop_recording', method='POST'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Streaming trial recorder.
+Appends samples to the trial's .bin file while recording instead of holding
+the whole trial in memory. Each sample is written as one float64 row
+[timestamp, ch1, ..., chN], i.e. the file is the (N+1) x num_samples
+column-major matrix that misc/readDAQData.m reads with fread(fid, [N+1, inf]).
+"""
+import os
+import time
+import numpy as np
+
+
+class StreamingRecorder:
+    """
+    Writes (samples, channels) blocks to disk as they arrive.
+    Memory use is bounded by the file buffer, data is flushed to disk every
+    flush_interval seconds, and closing the file costs O(1).
+    """
+
+    def __init__(self, bin_filename, num_channels, flush_interval=2.0, buffer_bytes=1 << 20):
+        """
+        Args:
+            bin_filename (str): Path of the .bin file to create.
+            num_channels (int): Number of EMG channels per sample.
+            flush_interval (float): Seconds between forced flushes to disk.
+            buffer_bytes (int): Size of the in-memory write buffer.
+        """
+        self.bin_filename = bin_filename
+        self.num_channels = num_channels
+        self.flush_interval = flush_interval
+        self.file = open(bin_filename, 'wb', buffering=buffer_bytes)
+        self.last_flush = time.monotonic()
+
+        # Preallocated row block: column 0 holds timestamps, the rest the channels
+        self.rows = np.empty((0, num_channels + 1), dtype=np.float64)
+
+        self.num_samples = 0
+        self.first_sample_index = None
+        self.next_sample_index = None
+        self.frames_lost = 0
+
+    def append(self, frames, timestamps, sample_index):
+        """
+        Append a (samples, channels) block whose first sample has device index
+        sample_index, with one timestamp per sample.
+        """
+        num_frames = frames.shape[0]
+        if num_frames == 0:
+            return
+        self._write(frames[:, :self.num_channels], timestamps, sample_index)
+
+        if self.first_sample_index is None:
+            self.first_sample_index = sample_index
+        elif sample_index > self.next_sample_index:
+            self.frames_lost += sample_index - self.next_sample_index
+        self.next_sample_index = sample_index + num_frames
+        self.num_samples += num_frames
+
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _write(self, frames, timestamps, sample_index):
+        """Write one block as [timestamp, ch1..chN] float64 rows."""
+        num_frames = frames.shape[0]
+        if self.rows.shape[0] < num_frames:
+            self.rows = np.empty((num_frames, self.num_channels + 1), dtype=np.float64)
+        rows = self.rows[:num_frames]
+        rows[:, 0] = timestamps
+        rows[:, 1:] = frames
+        rows.tofile(self.file)
+
+    def flush(self):
+        """Push buffered samples to the operating system and to disk."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def close(self, meta_data=None):
+        """
+        Flush and close the file; returns the number of samples written.
+        meta_data is unused here (the .bin format keeps metadata in a separate .mat file).
+        """
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+        return self.num_samples
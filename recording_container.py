@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Chunked, compressed recording container (.emgc), an alternative to the raw
+float64 .bin format.
+
+Samples are stored as float32, the precision the device sends, in blocks of
+block_samples samples. Each block stores each channel as its own
+zlib-compressed chunk, so one channel over one time range can be read without
+decoding anything else. Timestamps are not stored per sample. Each block keeps
+its first timestamp and its sample period, and the timestamps are rebuilt from
+those.
+
+File layout (little-endian):
+    b'EMGC', uint16 version, uint32 header length, JSON header
+    blocks: BLOCK_HEADER (b'BLK0', int64 sample index, uint32 samples,
+            float64 first timestamp, float64 sample period),
+            uint32 chunk size per channel, then the channel chunks
+    JSON footer (block offsets and metadata), uint64 footer length, b'EMGI'
+A file without a footer (e.g. after a crash) is recovered by scanning its blocks.
+"""
+import json
+import os
+import struct
+import zlib
+import numpy as np
+from recorder import StreamingRecorder
+from recording_reader import BaseRecording
+
+MAGIC = b'EMGC'
+FOOTER_MAGIC = b'EMGI'
+VERSION = 1
+BLOCK_HEADER = struct.Struct('<4sqIdd')
+ENCODINGS = ('float32', 'delta')
+
+
+def encode_chunk(samples, encoding, level):
+    """Compress one channel of a block (float32 samples) to bytes."""
+    words = np.ascontiguousarray(samples, dtype=np.float32).view(np.uint32)
+    if encoding == 'delta':
+        # Lossless: differences of the float bit patterns, wrapping in uint32
+        words = np.diff(words, prepend=np.uint32(0))
+    # Byte shuffle so zlib sees the slowly varying high bytes together
+    shuffled = words.view(np.uint8).reshape(-1, 4).T.tobytes()
+    return zlib.compress(shuffled, level)
+
+
+def decode_chunk(chunk, num_samples, encoding):
+    """Inverse of encode_chunk; returns float32 samples."""
+    shuffled = np.frombuffer(zlib.decompress(chunk), dtype=np.uint8).reshape(4, num_samples)
+    words = np.ascontiguousarray(shuffled.T).view(np.uint32).ravel()
+    if encoding == 'delta':
+        words = np.cumsum(words, dtype=np.uint32)
+    return words.view(np.float32)
+
+
+def _json_default(value):
+    """Serialize numpy values in metadata."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in container metadata")
+
+
+class ContainerRecorder(StreamingRecorder):
+    """
+    StreamingRecorder that writes the chunked container format.
+    Samples are buffered until a block is full (or the file is flushed), so a
+    crash loses at most flush_interval seconds.
+    """
+
+    def __init__(self, filename, num_channels, flush_interval=2.0, encoding='float32', block_samples=2000,
+                 compression_level=1, header=None):
+        """
+        Args:
+            filename (str): Path of the .emgc file to create.
+            num_channels (int): Number of EMG channels per sample.
+            flush_interval (float): Seconds between forced flushes to disk.
+            encoding (str): 'float32' or 'delta' (delta-coded float32), both lossless for float32 input.
+            block_samples (int): Samples per block, i.e. the granularity of random access.
+            compression_level (int): zlib level; low levels keep up with acquisition easily.
+            header (dict): Extra JSON-serializable values for the file header (e.g. fs, labels).
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown container encoding: {encoding}")
+        super().__init__(filename, num_channels, flush_interval=flush_interval)
+        self.encoding = encoding
+        self.block_samples = block_samples
+        self.compression_level = compression_level
+        self.blocks = []  # (file offset, first sample index, samples)
+
+        self.pending = np.empty((block_samples, num_channels), dtype=np.float32)
+        self.pending_count = 0
+        self.pending_start = None
+        self.pending_t0 = None
+        self.pending_t1 = None
+
+        header = dict(header or {}, num_channels=num_channels, encoding=encoding, block_samples=block_samples)
+        header_bytes = json.dumps(header, default=_json_default).encode()
+        self.file.write(MAGIC + struct.pack('<HI', VERSION, len(header_bytes)) + header_bytes)
+
+    def _write(self, frames, timestamps, sample_index):
+        """Buffer samples into blocks, starting a new block after any skipped samples."""
+        position = 0
+        while position < len(frames):
+            if self.pending_count and sample_index + position != self.pending_start + self.pending_count:
+                self._write_block()
+            count = min(len(frames) - position, self.block_samples - self.pending_count)
+            if self.pending_count == 0:
+                self.pending_start = sample_index + position
+                self.pending_t0 = timestamps[position]
+            self.pending[self.pending_count:self.pending_count + count] = frames[position:position + count]
+            self.pending_count += count
+            self.pending_t1 = timestamps[position + count - 1]
+            position += count
+            if self.pending_count == self.block_samples:
+                self._write_block()
+
+    def _write_block(self):
+        """Compress the pending block and write it."""
+        count = self.pending_count
+        if count == 0:
+            return
+        period = (self.pending_t1 - self.pending_t0) / (count - 1) if count > 1 else 0.0
+        chunks = [encode_chunk(self.pending[:count, channel], self.encoding, self.compression_level)
+                  for channel in range(self.num_channels)]
+        self.blocks.append((self.file.tell(), self.pending_start, count))
+        self.file.write(BLOCK_HEADER.pack(b'BLK0', self.pending_start, count, self.pending_t0, period))
+        self.file.write(np.array([len(chunk) for chunk in chunks], dtype='<u4').tobytes())
+        for chunk in chunks:
+            self.file.write(chunk)
+        self.pending_count = 0
+
+    def flush(self):
+        """Write any partial block, then push it to disk."""
+        self._write_block()
+        super().flush()
+
+    def close(self, meta_data=None):
+        """Write the remaining samples and the index footer, embedding meta_data."""
+        if not self.file.closed:
+            self._write_block()
+            footer = json.dumps({'blocks': self.blocks, 'meta_data': meta_data or {}},
+                                default=_json_default).encode()
+            self.file.write(footer + struct.pack('<Q', len(footer)) + FOOTER_MAGIC)
+        return super().close()
+
+
+class RecordingContainer(BaseRecording):
+    """
+    Random-access reader for .emgc files, with the same read() and channel
+    access as recording_reader.Recording.
+    """
+
+    def __init__(self, filename):
+        self.bin_filename = filename
+        with open(filename, 'rb') as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{filename} is not an EMG container")
+            version, header_length = struct.unpack('<HI', f.read(6))
+            if version > VERSION:
+                raise ValueError(f"{filename} has unsupported container version {version}")
+            self.header = json.loads(f.read(header_length))
+            self.data_offset = f.tell()
+            self.blocks, self.meta_data = self._read_footer(f)
+
+        self.num_channels = self.header['num_channels']
+        self.encoding = self.header['encoding']
+        self.fs = float(self.header.get('fs', self.meta_data.get('fs', 0.0)))
+        labels = list(self.header.get('labels', []))[:self.num_channels]
+        self.labels = labels + [f'Ch{i}' for i in range(len(labels), self.num_channels)]
+        # Position of every block's first sample within the recording
+        counts = np.array([block[2] for block in self.blocks], dtype=np.int64)
+        self.block_positions = np.concatenate(([0], np.cumsum(counts)))
+        self.num_samples = int(self.block_positions[-1])
+        self._block_headers = {}
+
+    def _read_footer(self, f):
+        """Return (blocks, meta_data) from the footer, or by scanning if there is none."""
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size >= self.data_offset + 12:
+            f.seek(size - 12)
+            footer_length, magic = struct.unpack('<Q4s', f.read(12))
+            if magic == FOOTER_MAGIC:
+                f.seek(size - 12 - footer_length)
+                footer = json.loads(f.read(footer_length))
+                return [tuple(block) for block in footer['blocks']], footer['meta_data']
+
+        print(f"⚠️  {os.path.basename(self.bin_filename)} has no index; recovering blocks by scanning")
+        blocks = []
+        offset = self.data_offset
+        chunk_sizes = struct.Struct(f"<{self.header['num_channels']}I")
+        while offset + BLOCK_HEADER.size + chunk_sizes.size <= size:
+            f.seek(offset)
+            magic, sample_index, count, _, _ = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+            if magic != b'BLK0':
+                break
+            end = offset + BLOCK_HEADER.size + chunk_sizes.size + sum(chunk_sizes.unpack(f.read(chunk_sizes.size)))
+            if end > size:
+                break
+            blocks.append((offset, sample_index, count))
+            offset = end
+        return blocks, {}
+
+    def _block_header(self, f, block_number):
+        """Return (first timestamp, sample period, chunk offsets, chunk sizes) of a block."""
+        if block_number not in self._block_headers:
+            offset = self.blocks[block_number][0]
+            f.seek(offset)
+            _, _, _, t0, period = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+            sizes = np.frombuffer(f.read(4 * self.num_channels), dtype='<u4').astype(np.int64)
+            starts = offset + BLOCK_HEADER.size + 4 * self.num_channels + np.concatenate(([0], np.cumsum(sizes)[:-1]))
+            self._block_headers[block_number] = (t0, period, starts, sizes)
+        return self._block_headers[block_number]
+
+    def _metadata_value(self, name, default):
+        return self.meta_data.get(name, default)
+
+    def read(self, channels=None, start_time=None, stop_time=None):
+        """
+        Read channels (labels or indices, default all) between two times in seconds.
+        Returns (timestamps, samples) with samples shaped (len(channels), n);
+        only the blocks and channels asked for are decompressed.
+        """
+        if channels is None:
+            channels = range(self.num_channels)
+        elif isinstance(channels, (str, int)):
+            channels = [channels]
+        channels = [self.channel_index(channel) for channel in channels]
+        samples = self.sample_range(start_time, stop_time)
+        num_samples = samples.stop - samples.start
+        timestamps = np.empty(num_samples)
+        data = np.empty((len(channels), num_samples), dtype=np.float32)
+        if num_samples == 0:
+            return timestamps, data
+
+        first = int(np.searchsorted(self.block_positions, samples.start, side='right')) - 1
+        last = int(np.searchsorted(self.block_positions, samples.stop, side='left'))
+        with open(self.bin_filename, 'rb') as f:
+            for block_number in range(first, last):
+                block_start = self.block_positions[block_number]
+                count = self.blocks[block_number][2]
+                lo = max(samples.start, block_start) - block_start
+                hi = min(samples.stop, block_start + count) - block_start
+                out = slice(block_start + lo - samples.start, block_start + hi - samples.start)
+                t0, period, starts, sizes = self._block_header(f, block_number)
+                timestamps[out] = t0 + period * np.arange(lo, hi)
+                for row, channel in enumerate(channels):
+                    f.seek(starts[channel])
+                    data[row, out] = decode_chunk(f.read(sizes[channel]), count, self.encoding)[lo:hi]
+        return timestamps, data
+
+    @property
+    def timestamps(self):
+        """Per-sample host timestamps rebuilt from the block timing."""
+        return self.read(channels=[])[0]
+
+    def __getitem__(self, channel):
+        """All samples of one channel, by label or index."""
+        return self.read(channel)[1][0]
+
+    def __repr__(self):
+        return (f"RecordingContainer({os.path.basename(self.bin_filename)!r}, {self.num_channels} channels, "
+                f"{self.fs:g} Hz, {self.encoding})")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Reader for the recordings written by app.py: a {session}_Trl####.bin file of
+float64 timestamps and channel samples, plus metadata/{session}_METADATATrl####.mat.
+The .bin file is memory-mapped, so opening a recording reads only the metadata
+and slicing a channel or time window reads only those samples from disk.
+"""
+import glob
+import os
+import re
+import numpy as np
+
+
+class BaseRecording:
+    """
+    Channel lookup and time slicing shared by Recording and
+    recording_container.RecordingContainer. Subclasses provide fs, num_channels,
+    labels, num_samples and _metadata_value().
+    """
+
+    # Row of channel 0 in the subclass's sample array
+    CHANNEL_ROW = 0
+
+    def _metadata_value(self, name, default):
+        """A field of the trial's metadata, or default if it was not recorded."""
+        raise NotImplementedError
+
+    @property
+    def pretrigger_samples(self):
+        """Samples recorded before the trial was triggered (0 for older recordings)."""
+        return int(self._metadata_value('pretrigger_samples', 0))
+
+    @property
+    def duration(self):
+        """Length of the trial in seconds at the nominal rate."""
+        return self.num_samples / self.fs if self.fs else 0.0
+
+    def channel_index(self, channel):
+        """Row of a channel in the sample array, given its label or its 0-based index."""
+        if isinstance(channel, str):
+            try:
+                return self.labels.index(channel) + self.CHANNEL_ROW
+            except ValueError:
+                raise KeyError(f"No channel labelled {channel!r} in {self.bin_filename}")
+        if not 0 <= channel < self.num_channels:
+            raise IndexError(f"Channel {channel} out of range (0-{self.num_channels - 1})")
+        return channel + self.CHANNEL_ROW
+
+    def sample_range(self, start_time=None, stop_time=None):
+        """Sample slice covering [start_time, stop_time) seconds from the start of the trial."""
+        start = 0 if start_time is None else int(np.clip(round(start_time * self.fs), 0, self.num_samples))
+        stop = self.num_samples if stop_time is None else int(np.clip(round(stop_time * self.fs), start, self.num_samples))
+        return slice(start, stop)
+
+    def __len__(self):
+        return self.num_samples
+
+
+class Recording(BaseRecording):
+    """
+    One recorded trial.
+    recording.data is a (channels + 1, samples) view of the file whose row 0 holds
+    the timestamps; channels can be selected by muscle label or index.
+    """
+
+    CHANNEL_ROW = 1
+
+    def __init__(self, bin_filename, meta_filename=None):
+        """
+        Args:
+            bin_filename (str): Path of the trial's .bin file.
+            meta_filename (str): Path of its metadata .mat file; found next to
+                                 the .bin file in metadata/ if not given.
+        """
+        self.bin_filename = bin_filename
+        self.meta_filename = meta_filename or find_metadata(bin_filename)
+        self._meta_data = None
+        self._data = None
+
+    @property
+    def meta_data(self):
+        """The trial's metadata struct, loaded on first use."""
+        if self._meta_data is None:
+            import scipy.io
+            mat = scipy.io.loadmat(self.meta_filename, squeeze_me=True, struct_as_record=False)
+            self._meta_data = mat['meta_data']
+        return self._meta_data
+
+    def _metadata_value(self, name, default):
+        return getattr(self.meta_data, name, default)
+
+    @property
+    def fs(self):
+        """Nominal sampling rate in Hz."""
+        return float(self.meta_data.fs)
+
+    @property
+    def num_channels(self):
+        """Number of recorded channels (excluding the timestamp row)."""
+        return int(self.meta_data.total_analog_in_ch)
+
+    @property
+    def labels(self):
+        """Muscle label of every channel, padded with ChN for unlabelled channels."""
+        # savemat stores a list of labels as a space-padded char matrix
+        labels = [str(label).strip() for label in np.atleast_1d(self.meta_data.musc_labels)][:self.num_channels]
+        return labels + [f'Ch{i}' for i in range(len(labels), self.num_channels)]
+
+    @property
+    def layout(self):
+        """'interleaved' (one [t, ch1..chN] row per sample) or 'planar' (one row per channel)."""
+        return str(self._metadata_value('data_layout', 'planar'))
+
+    @property
+    def data(self):
+        """Memory-mapped (channels + 1, samples) float64 array; row 0 is the timestamps."""
+        if self._data is None:
+            rows = self.num_channels + 1
+            # Ignore a trailing partial sample, e.g. from a trial that is still being written
+            num_samples = os.path.getsize(self.bin_filename) // (8 * rows)
+            if num_samples == 0:
+                self._data = np.zeros((rows, 0))
+            elif self.layout == 'interleaved':
+                self._data = np.memmap(self.bin_filename, dtype=np.float64, mode='r',
+                                       shape=(num_samples, rows)).T
+            else:
+                self._data = np.memmap(self.bin_filename, dtype=np.float64, mode='r',
+                                       shape=(rows, num_samples))
+        return self._data
+
+    @property
+    def num_samples(self):
+        """Number of samples per channel."""
+        return self.data.shape[1]
+
+    @property
+    def timestamps(self):
+        """Per-sample host timestamps (epoch seconds)."""
+        return self.data[0]
+
+    def read(self, channels=None, start_time=None, stop_time=None):
+        """
+        Read channels (labels or indices, default all) between two times in seconds.
+        Returns (timestamps, samples) with samples shaped (len(channels), n).
+        """
+        if channels is None:
+            channels = range(self.num_channels)
+        elif isinstance(channels, (str, int)):
+            channels = [channels]
+        rows = [self.channel_index(channel) for channel in channels]
+        samples = self.sample_range(start_time, stop_time)
+        return np.array(self.data[0, samples]), np.array(self.data[rows, samples])
+
+    def __getitem__(self, channel):
+        """Memory-mapped samples of one channel, by label or index."""
+        return self.data[self.channel_index(channel)]
+
+    def __repr__(self):
+        return f"Recording({os.path.basename(self.bin_filename)!r}, {self.num_channels} channels, {self.fs:g} Hz)"
+
+
+def find_metadata(bin_filename):
+    """Return the metadata file written for a .bin recording."""
+    directory, name = os.path.split(bin_filename)
+    metadata_directory = os.path.join(directory, 'metadata')
+    match = re.match(r'(.*)_Trl(\d+)\.bin$', name)
+    if match:
+        meta_filename = os.path.join(metadata_directory, f"{match.group(1)}_METADATATrl{match.group(2)}.mat")
+        if os.path.exists(meta_filename):
+            return meta_filename
+        # Same fallback as readDAQData.m: any metadata file for this trial number
+        candidates = sorted(glob.glob(os.path.join(metadata_directory, f"*Trl{match.group(2)}.mat")))
+        if candidates:
+            return candidates[-1]
+    raise FileNotFoundError(f"No metadata found for {bin_filename}")
+
+
+def open_recording(filename):
+    """Open a .bin recording or an .emgc container recording."""
+    if filename.endswith('.emgc'):
+        from recording_container import RecordingContainer
+        return RecordingContainer(filename)
+    return Recording(filename)
+
+
+def recording_filenames(directory):
+    """Every trial (.bin or .emgc) in a save directory, sorted by file name."""
+    filenames = glob.glob(os.path.join(directory, '*_Trl*.bin')) + glob.glob(os.path.join(directory, '*_Trl*.emgc'))
+    return sorted(filenames)
+
+
+def open_recordings(directory):
+    """Open every trial (.bin or .emgc) in a save directory, sorted by file name."""
+    return [open_recording(filename) for filename in recording_filenames(directory)]
+
+
+# Example usage if run directly (for inspecting a save directory)
+if __name__ == "__main__":
+    import sys
+    for recording in open_recordings(sys.argv[1] if len(sys.argv) > 1 else './recordings'):
+        print(f"{recording}: {recording.num_samples} samples ({recording.duration:.1f} s)")
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Preallocated multi-channel ring buffer for streaming samples.
+Samples are stored as frames (one row per time step, one column per channel)
+and addressed by a monotonically increasing frame cursor.
+A single producer writes; any number of RingReader consumers read at their
+own pace without locks and can tell exactly how many frames they missed.
+Consumers that wait for new frames sleep on a condition the producer notifies
+once per write, instead of polling the cursor.
+"""
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class FrameRingBuffer:
+    """
+    Fixed-size 2D ring buffer of shape (capacity, channels).
+    The write cursor counts every frame ever written, so a position in the
+    stream is simply an integer and never wraps.
+    """
+
+    def __init__(self, capacity, channels, dtype=np.float32, data=None, cursor=None, write_condition=None):
+        """
+        Args:
+            capacity (int): Number of frames the buffer can hold.
+            channels (int): Number of channels per frame.
+            dtype: NumPy dtype of the stored samples.
+            data (np.ndarray): Optional preallocated (capacity, channels) storage,
+                               e.g. backed by shared memory.
+            cursor (np.ndarray): Optional preallocated int64 array of length 1
+                                 holding the write cursor.
+            write_condition: Optional condition notified after every write, e.g. a
+                             multiprocessing Condition shared with the producer process.
+        """
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self.data = data if data is not None else np.zeros((self.capacity, self.channels), dtype=dtype)
+        self.cursor = cursor if cursor is not None else np.zeros(1, dtype=np.int64)
+        # Oldest slots a reader treats as already overwritten, since the producer
+        # may be filling them while the reader copies (writes must be smaller than this)
+        self.guard = max(1, self.capacity // 8)
+        self.write_condition = write_condition if write_condition is not None else threading.Condition()
+
+    @property
+    def write_cursor(self):
+        """Total number of frames ever written."""
+        return int(self.cursor[0])
+
+    @write_cursor.setter
+    def write_cursor(self, value):
+        self.cursor[0] = value
+
+    def write(self, frames):
+        """
+        Append a (num_frames, channels) block, overwriting the oldest frames.
+        At most two slice copies are made regardless of the channel count.
+        """
+        num_frames = frames.shape[0]
+        write_cursor = self.write_cursor
+        if num_frames > self.capacity:
+            # Only the newest frames fit; skip the rest but keep the cursor exact
+            write_cursor += num_frames - self.capacity
+            frames = frames[-self.capacity:]
+            num_frames = self.capacity
+        start = write_cursor % self.capacity
+        first = min(num_frames, self.capacity - start)
+        self.data[start:start + first] = frames[:first]
+        if first < num_frames:
+            self.data[:num_frames - first] = frames[first:]
+        # Publish only after the frames are in place so readers never see stale data
+        self.write_cursor = write_cursor + num_frames
+        with self.write_condition:
+            self.write_condition.notify_all()
+
+    def wait_for_write(self, cursor, timeout):
+        """
+        Wait up to timeout seconds for the write cursor to leave cursor, or for wake();
+        returns the write cursor.
+        """
+        with self.write_condition:
+            if self.write_cursor == cursor:
+                self.write_condition.wait(timeout)
+        return self.write_cursor
+
+    def wake(self):
+        """Wake every waiting reader without writing, e.g. when the producer stops."""
+        with self.write_condition:
+            self.write_condition.notify_all()
+
+    def oldest_cursor(self):
+        """Return the cursor of the oldest frame still held in the buffer."""
+        return max(0, self.write_cursor - self.capacity)
+
+    def read(self, cursor, num_frames):
+        """
+        Return num_frames frames starting at cursor as a (num_frames, channels) array.
+        The result is a view when the range does not wrap, otherwise a copy.
+        """
+        if cursor < self.oldest_cursor() or cursor + num_frames > self.write_cursor:
+            raise IndexError(f"Frames [{cursor}, {cursor + num_frames}) are not in the buffer")
+        return self._slice(cursor, num_frames)
+
+    def _slice(self, cursor, num_frames):
+        """Return frames [cursor, cursor + num_frames) without bounds checks."""
+        start = cursor % self.capacity
+        end = start + num_frames
+        if end <= self.capacity:
+            return self.data[start:end]
+        return np.concatenate((self.data[start:], self.data[:end - self.capacity]))
+
+    def clear(self):
+        """Reset the buffer to empty."""
+        self.write_cursor = 0
+
+    def latest(self, num_frames):
+        """Return up to the newest num_frames frames and the cursor of the first one."""
+        write_cursor = self.write_cursor
+        start = max(write_cursor - self.capacity + self.guard, write_cursor - num_frames, 0)
+        return np.array(self._slice(start, write_cursor - start)), start
+
+    def reader(self, from_start=False, cursor=None):
+        """
+        Create a consumer with its own read cursor.
+        By default the reader starts at the current write position; cursor starts it
+        at an earlier frame instead (clamped to the oldest frame it can safely read).
+        """
+        return RingReader(self, from_start=from_start, cursor=cursor)
+
+
+class RingReader:
+    """
+    Independent consumer of a FrameRingBuffer.
+    Reading never blocks the producer. If the producer laps the reader, the
+    overwritten frames are skipped and counted in frames_lost and overruns.
+    """
+
+    def __init__(self, ring, from_start=False, cursor=None):
+        self.ring = ring
+        self.read_cursor = ring.oldest_cursor() if from_start else ring.write_cursor
+        if cursor is not None:
+            write_cursor = ring.write_cursor
+            self.read_cursor = min(write_cursor, max(cursor, write_cursor - ring.capacity + ring.guard, 0))
+        self.frames_read = 0
+        self.frames_lost = 0
+        self.overruns = 0
+
+    def available(self):
+        """Number of frames written since the last read."""
+        return self.ring.write_cursor - self.read_cursor
+
+    def read(self, max_frames=None, timeout=0.0):
+        """
+        Return (frames, start_cursor) for the frames written since the last read.
+        frames is a (num_frames, channels) copy and may be empty. If timeout is
+        given, wait up to that many seconds until at least one frame is available.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            write_cursor = self.ring.write_cursor
+            if write_cursor < self.read_cursor:
+                # The producer was reset (new stream); start over from its beginning
+                self.read_cursor = 0
+            remaining = deadline - time.monotonic()
+            if write_cursor > self.read_cursor or remaining <= 0:
+                break
+            if self.ring.wait_for_write(write_cursor, remaining) == write_cursor:
+                # Woken without new frames: timed out, or the producer stopped
+                break
+
+        safe_cursor = write_cursor - self.ring.capacity + self.ring.guard
+        if self.read_cursor < safe_cursor:
+            self._lose(safe_cursor - self.read_cursor)
+        start = self.read_cursor
+        num_frames = max(0, write_cursor - start)
+        if max_frames is not None:
+            num_frames = min(num_frames, max_frames)
+        frames = np.array(self.ring._slice(start, num_frames))
+
+        # Frames the producer reached while we were copying them are not trustworthy
+        overwritten = min(num_frames, self.ring.write_cursor - self.ring.capacity + self.ring.guard - start)
+        if overwritten > 0:
+            self._lose(overwritten)
+            frames = frames[overwritten:]
+            start += overwritten
+            num_frames -= overwritten
+
+        self.read_cursor = start + num_frames
+        self.frames_read += num_frames
+        return frames, start
+
+    def _lose(self, num_frames):
+        """Record frames skipped because the producer overwrote them."""
+        self.frames_lost += num_frames
+        self.overruns += 1
+        self.read_cursor += num_frames
+        print(f"⚠️  Ring reader overrun: {num_frames} frames lost")
+
+    def get_stats(self):
+        """Return a dictionary of reader counters."""
+        return {
+            'read_cursor': self.read_cursor,
+            'frames_read': self.frames_read,
+            'frames_lost': self.frames_lost,
+            'overruns': self.overruns,
+        }
+
+
+class SharedFrameRingBuffer(FrameRingBuffer):
+    """
+    FrameRingBuffer whose cursor and samples live in multiprocessing shared memory.
+    Layout: one int64 write cursor followed by (capacity, channels) float32 frames.
+    One process creates it and writes; other processes attach and read with
+    RingReader exactly as they would a local ring.
+    """
+
+    CURSOR_BYTES = 8
+
+    def __init__(self, shm, capacity, channels, owner, write_condition=None):
+        cursor = np.ndarray((1,), dtype=np.int64, buffer=shm.buf, offset=0)
+        data = np.ndarray((capacity, channels), dtype=np.float32, buffer=shm.buf, offset=self.CURSOR_BYTES)
+        super().__init__(capacity, channels, data=data, cursor=cursor, write_condition=write_condition)
+        self.shm = shm
+        self.owner = owner
+        self.unlinked = False
+
+    @classmethod
+    def create(cls, capacity, channels, write_condition=None):
+        """
+        Allocate a new zeroed shared ring. Readers in this process are woken by
+        writes in another only if both sides share write_condition.
+        """
+        nbytes = cls.CURSOR_BYTES + int(capacity) * int(channels) * np.dtype(np.float32).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        ring = cls(shm, int(capacity), int(channels), owner=True, write_condition=write_condition)
+        ring.cursor[0] = 0
+        ring.data[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity, channels, write_condition=None):
+        """Attach to a shared ring created by another process."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: child processes share the creator's resource tracker,
+            # so the duplicate registration is harmless
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, int(capacity), int(channels), owner=False, write_condition=write_condition)
+
+    @property
+    def name(self):
+        """Shared memory block name used to attach from another process."""
+        return self.shm.name
+
+    def close(self):
+        """
+        Stop sharing the ring: the creating process unlinks the block so nothing new
+        can attach. The mapping stays valid until the last reference to the ring is
+        dropped, so a reader still inside read() sees a stopped ring, not freed memory.
+        """
+        if self.owner and not self.unlinked:
+            self.unlinked = True
+            self.shm.unlink()
+
+    def __del__(self):
+        # Drop the NumPy views first so the buffer can be released
+        self.data = None
+        self.cursor = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A view of the frames outlives the ring; the mapping goes with it
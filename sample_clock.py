@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Maps device sample indices to host time.
+The Trigno stream carries no timestamps, so every packet arrival is logged as
+(number of samples received so far, host monotonic time). A least-squares fit
+of those points gives the device sampling period as seen by the host clock
+(i.e. the clock drift). A gap of missing samples shows as a step in arrival
+lateness that is not matched by received samples: the earliest arrivals of a
+window of packets jump later than the earliest arrivals just before it.
+Lateness is measured against a fit of the recent packets only, so jitter, an
+early first packet and a slowly wandering rate are not mistaken for gaps.
+"""
+import time
+from collections import deque
+import numpy as np
+
+
+class SampleClock:
+    """
+    Running estimate of the device sample clock against the host monotonic clock.
+    All shared results live in a fixed-size float64 state array so another
+    process can read them (see AcquisitionProcess).
+    """
+
+    MAX_GAPS = 64
+    # State layout
+    NOMINAL_RATE, ANCHOR_TIME, SECONDS_PER_SAMPLE, TOTAL_MISSING, NUM_GAPS, WALL_OFFSET, UPDATES = range(7)
+    GAPS_OFFSET = 8
+    STATE_SIZE = GAPS_OFFSET + 2 * MAX_GAPS
+
+    def __init__(self, sampling_rate, gap_threshold=0.04, window=20, history=160, state=None):
+        """
+        Args:
+            sampling_rate (float): Nominal device sampling rate in Hz.
+            gap_threshold (float): Seconds by which the earliest arrivals of `window`
+                                   packets must step later to count as a gap.
+            window (int): Number of consecutive packets a step must persist for.
+            history (int): Number of recent packets the lateness reference is fitted to.
+            state (np.ndarray): Optional preallocated float64 array of STATE_SIZE.
+        """
+        self.gap_threshold = gap_threshold
+        self.window = window
+        self.history_size = max(history, 2 * window)
+        self.state = state if state is not None else np.zeros(self.STATE_SIZE)
+        self.reset(sampling_rate)
+
+    def reset(self, sampling_rate=None):
+        """Forget all history, optionally changing the nominal rate."""
+        if sampling_rate is None:
+            sampling_rate = self.state[self.NOMINAL_RATE]
+        self.state[:] = 0
+        self.state[self.NOMINAL_RATE] = sampling_rate
+        self.state[self.SECONDS_PER_SAMPLE] = 1.0 / sampling_rate
+        self.state[self.WALL_OFFSET] = time.time() - time.monotonic()
+        # Least-squares accumulators relative to the first point (producer side only)
+        self.origin = None
+        self.sums = np.zeros(5)  # n, sum_k, sum_t, sum_kk, sum_kt
+        self.pending = deque()
+        self.history = deque(maxlen=self.history_size)
+        self.established = False
+        self.last_index = 0
+
+    def copy(self):
+        """Return an independent snapshot of the clock for reading timestamps."""
+        clock = SampleClock.__new__(SampleClock)
+        clock.gap_threshold = self.gap_threshold
+        clock.window = self.window
+        clock.history_size = self.history_size
+        clock.state = np.array(self.state)
+        clock.origin = None
+        clock.sums = np.zeros(5)
+        clock.pending = deque()
+        clock.history = deque(maxlen=self.history_size)
+        clock.established = False
+        clock.last_index = 0
+        return clock
+
+    def update(self, sample_index, host_time=None):
+        """
+        Record that `sample_index` samples have been received by `host_time`
+        (monotonic seconds, defaulting to now).
+        Points wait in a window of `window` packets before entering the fit, so a
+        gap is detected before its late arrivals can bias the drift estimate.
+        Gaps are only looked for once the fit spans a second and the recent history is full.
+        """
+        if host_time is None:
+            host_time = time.monotonic()
+        state = self.state
+        if self.origin is None:
+            self.origin = (sample_index, host_time)
+            self.last_index = sample_index
+            state[self.ANCHOR_TIME] = host_time - sample_index * state[self.SECONDS_PER_SAMPLE]
+        state[self.UPDATES] += 1
+
+        self.pending.append([self.last_index, sample_index + state[self.TOTAL_MISSING], host_time])
+        self.last_index = sample_index
+        if len(self.pending) < self.window:
+            return
+        if self.established:
+            missing = self._detect_gap()
+            if missing > 0:
+                self._record_gap(self.pending[0][0], missing)
+                for point in self.pending:
+                    point[1] += missing
+
+        # Confirmed point enters the least-squares fit of host time against sample index
+        _, corrected, point_time = self.pending.popleft()
+        self.history.append((corrected, point_time))
+        k = corrected - self.origin[0]
+        t = point_time - self.origin[1]
+        self.sums += (1.0, k, t, k * k, k * t)
+
+        # Refit the sampling period and anchor once the points span at least a second
+        n, sum_k, sum_t, sum_kk, sum_kt = self.sums
+        denominator = n * sum_kk - sum_k * sum_k
+        if k * state[self.SECONDS_PER_SAMPLE] > 1.0 and denominator > 0:
+            slope = (n * sum_kt - sum_k * sum_t) / denominator
+            intercept = (sum_t - slope * sum_k) / n
+            state[self.SECONDS_PER_SAMPLE] = slope
+            state[self.ANCHOR_TIME] = self.origin[1] + intercept - self.origin[0] * slope
+            self.established = len(self.history) == self.history_size
+
+    def _detect_gap(self):
+        """
+        Samples missing before the pending window, or 0.
+        A line fitted to the recent history gives each packet's lateness. Jitter only
+        ever delays arrivals, so the earliest arrivals (minimum lateness) track the
+        device clock; a gap is a step of that minimum from the newest history packets
+        to the pending window, while a rate change only tilts it slowly.
+        """
+        history = np.array(self.history)
+        origin = history[0, 0]
+        k = history[:, 0] - origin
+        t = history[:, 1]
+        k_mean, t_mean = k.mean(), t.mean()
+        slope = ((k - k_mean) * (t - t_mean)).sum() / ((k - k_mean) ** 2).sum()
+        intercept = t_mean - slope * k_mean
+        floor = (t - intercept - slope * k)[-self.window:].min()
+
+        pending = np.array([point[1:] for point in self.pending])
+        lateness = pending[:, 1] - intercept - slope * (pending[:, 0] - origin)
+        step = lateness.min() - floor
+        if step <= self.gap_threshold:
+            return 0
+        return int(round(step / slope))
+
+    def _record_gap(self, sample_index, missing):
+        """Add a gap of `missing` samples before received sample `sample_index`."""
+        state = self.state
+        num_gaps = int(state[self.NUM_GAPS])
+        if num_gaps < self.MAX_GAPS:
+            state[self.GAPS_OFFSET + 2 * num_gaps] = sample_index
+            state[self.GAPS_OFFSET + 2 * num_gaps + 1] = missing
+        state[self.NUM_GAPS] = num_gaps + 1
+        state[self.TOTAL_MISSING] += missing
+        print(f"⚠️  Gap detected: ~{missing} samples missing before sample {sample_index}")
+
+    def gaps(self):
+        """Return the recorded gaps as a (num_gaps, 2) array of (sample_index, missing_samples)."""
+        num_gaps = min(int(self.state[self.NUM_GAPS]), self.MAX_GAPS)
+        return self.state[self.GAPS_OFFSET:self.GAPS_OFFSET + 2 * num_gaps].reshape(-1, 2).copy()
+
+    def time_of(self, sample_index, wall=False):
+        """
+        Host time of received sample index (scalar or array), accounting for gaps.
+        Monotonic seconds by default, or epoch seconds if wall is True.
+        """
+        state = self.state
+        sample_index = np.asarray(sample_index, dtype=np.float64)
+        gaps = self.gaps()
+        if len(gaps):
+            missing_before = np.concatenate(([0.0], np.cumsum(gaps[:, 1])))
+            sample_index = sample_index + missing_before[np.searchsorted(gaps[:, 0], sample_index, side='right')]
+        timestamps = state[self.ANCHOR_TIME] + sample_index * state[self.SECONDS_PER_SAMPLE]
+        if wall:
+            timestamps = timestamps + state[self.WALL_OFFSET]
+        return timestamps
+
+    def index_at(self, host_time, wall=False):
+        """
+        Received sample index at a host time (the inverse of time_of), as a float;
+        places an external event such as a trigger message on the sample axis.
+        A time inside a gap maps to the first sample after the gap.
+        """
+        state = self.state
+        if wall:
+            host_time = host_time - state[self.WALL_OFFSET]
+        position = (host_time - state[self.ANCHOR_TIME]) / state[self.SECONDS_PER_SAMPLE]
+        gaps = self.gaps()
+        if not len(gaps):
+            return float(position)
+        missing = np.cumsum(gaps[:, 1])
+        # Positions (in device samples, including missing ones) where each gap ends
+        resumed = gaps[:, 0] + missing
+        num_before = int(np.searchsorted(resumed, position, side='right'))
+        index = position - (missing[num_before - 1] if num_before else 0.0)
+        if num_before < len(gaps):
+            index = min(index, gaps[num_before, 0])
+        return float(index)
+
+    def timestamps(self, start_index, num_samples, wall=True):
+        """Per-sample timestamps for num_samples received samples starting at start_index."""
+        return self.time_of(start_index + np.arange(num_samples), wall=wall)
+
+    def effective_rate(self):
+        """Device sampling rate as measured by the host clock."""
+        return 1.0 / self.state[self.SECONDS_PER_SAMPLE]
+
+    def drift_ppm(self):
+        """Device clock drift relative to the nominal rate, in parts per million."""
+        return (self.effective_rate() / self.state[self.NOMINAL_RATE] - 1.0) * 1e6
+
+    def get_report(self, start_index=0, end_index=None):
+        """Return a dictionary describing the clock and the gaps between two sample indices."""
+        gaps = self.gaps()
+        if end_index is None:
+            end_index = np.inf
+        gaps = gaps[(gaps[:, 0] >= start_index) & (gaps[:, 0] < end_index)] if len(gaps) else gaps
+        return {
+            'nominal_rate': float(self.state[self.NOMINAL_RATE]),
+            'effective_rate': float(self.effective_rate()),
+            'drift_ppm': float(self.drift_ppm()),
+            'num_gaps': int(len(gaps)),
+            'gap_sample_index': gaps[:, 0] if len(gaps) else np.zeros(0),
+            'gap_missing_samples': gaps[:, 1] if len(gaps) else np.zeros(0),
+            'missing_samples': float(gaps[:, 1].sum()) if len(gaps) else 0.0,
+        }
+
+
+# Self-check if run directly: simulated packet arrivals with and without a drop
+if __name__ == "__main__":
+    def simulate(duration=6.0, rate=2000.0, packet=27, jitter=0.008, first_early=0.0, wander=0.0,
+                 drop_at=None, drop_samples=0, seed=0):
+        """Feed a clock with jittered arrivals; returns its (num_gaps, missing_samples)."""
+        rng = np.random.default_rng(seed)
+        clock = SampleClock(rate)
+        device_time, received = 0.0, 0
+        while device_time < duration:
+            # The device rate wanders sinusoidally by `wander` (relative)
+            period = 1.0 / (rate * (1.0 + wander * np.sin(2 * np.pi * device_time / 4.0)))
+            device_time += packet * period
+            if drop_at is not None and device_time >= drop_at and drop_samples:
+                device_time += drop_samples * period
+                drop_samples = 0
+            received += packet
+            arrival = 100.0 + device_time + 0.002 + rng.exponential(jitter)
+            if received == packet:
+                arrival -= first_early
+            clock.update(received, arrival)
+        report = clock.get_report()
+        return report['num_gaps'], report['missing_samples']
+
+    import builtins
+    print_ = builtins.print
+    builtins.print = lambda *args, **kwargs: None
+    results = {
+        'lossless jittered': simulate(),
+        'first packet 60 ms early': simulate(first_early=0.06),
+        'rate wandering 3%': simulate(wander=0.03),
+        'bursty jitter': simulate(jitter=0.03),
+        '200 samples dropped': simulate(drop_at=3.0, drop_samples=200),
+    }
+    builtins.print = print_
+    for name, (num_gaps, missing) in results.items():
+        print(f"{name:>26}: {num_gaps} gaps, {missing:.0f} samples missing")
+    assert all(result == (0, 0.0) for name, result in results.items() if 'dropped' not in name)
+    assert results['200 samples dropped'][0] == 1 and abs(results['200 samples dropped'][1] - 200) <= 10
+    print("✅ Sample clock self-check passed")
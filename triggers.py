@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Automatic trial segmentation.
+EnvelopeTrigger finds trial onsets and offsets in the streaming EMG envelope,
+with per-channel thresholds, hysteresis and a hold-off. MessageListener
+receives the experiment-control messages that the MessageHandler
+(network_data_streaming_samples/messageHandler) sends to its modules over UDP.
+Both report events as device sample indices, so trials are cut at the sample
+where the trigger happened rather than when a person reacted to it.
+"""
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from emg_filters import ENVELOPE_CUTOFF, _scipy_signal, envelope_sos
+
+# Message types and layouts from messageHandler/messageDefinitions.h
+MSG_HEADER = struct.Struct('<iidd')  # serial_no, msg_type, reserved, timestamp
+MAX_PACKET_LENGTH = 8192
+MAX_STRING_LENGTH = 128
+SESSION_START = 1
+SESSION_END = 2
+TRIAL_START = 3
+TRIAL_END = 4
+START_RECORDING = 5
+STOP_RECORDING = 6
+MESSAGE_NAMES = {SESSION_START: 'SESSION_START', SESSION_END: 'SESSION_END', TRIAL_START: 'TRIAL_START',
+                 TRIAL_END: 'TRIAL_END', START_RECORDING: 'START_RECORDING', STOP_RECORDING: 'STOP_RECORDING'}
+# Subscribing to this module ID subscribes to every module (see MessageHandler::subscribeTo)
+ALL_MODULES = 999
+
+
+class EnvelopeTrigger:
+    """
+    Onset/offset detector on the EMG envelope.
+    A trial starts at the first sample where at least min_active_channels
+    envelopes reach their on threshold, and stops at the first sample where
+    fewer than min_active_channels stay above their (lower) off threshold.
+    No event follows another within hold_off seconds, so chewing bursts or
+    threshold chatter do not split a trial.
+    """
+
+    def __init__(self, sampling_rate, num_channels, on_thresholds, off_thresholds=None, channels=None,
+                 min_active_channels=1, hold_off=0.5, envelope_cutoff=ENVELOPE_CUTOFF):
+        """
+        Args:
+            sampling_rate (float): Sampling rate in Hz.
+            num_channels (int): Number of channels in the frames passed to process().
+            on_thresholds (float or sequence): Envelope level that starts a trial, for
+                                               all channels or one per channel.
+            off_thresholds (float or sequence): Level the envelope must fall below to stop
+                                                a trial; half the on threshold by default.
+            channels (sequence): Channels to evaluate (default all).
+            min_active_channels (int): Channels that must be active for a trial to run.
+            hold_off (float): Minimum seconds between two events.
+            envelope_cutoff (float): Envelope low-pass cutoff in Hz.
+        """
+        self.SAMPLING_RATE = sampling_rate
+        self.channels = np.arange(num_channels) if channels is None else np.asarray(channels, dtype=int)
+        on_thresholds = np.broadcast_to(np.asarray(on_thresholds, dtype=np.float64), (num_channels,))
+        if off_thresholds is None:
+            off_thresholds = on_thresholds * 0.5
+        off_thresholds = np.broadcast_to(np.asarray(off_thresholds, dtype=np.float64), (num_channels,))
+        if np.any(off_thresholds > on_thresholds):
+            raise ValueError("Off thresholds must not exceed the on thresholds")
+        self.on_thresholds = on_thresholds[self.channels]
+        self.off_thresholds = off_thresholds[self.channels]
+        self.min_active_channels = max(1, min(int(min_active_channels), len(self.channels)))
+        self.hold_off_samples = int(round(hold_off * sampling_rate))
+
+        # The same envelope low-pass as the handler's StreamingEMGFilter
+        self._sosfilt = _scipy_signal().sosfilt
+        self.sos, self.sos_zi = envelope_sos(sampling_rate, envelope_cutoff)
+        self.reset()
+
+    def reset(self):
+        """Forget the envelope state and any trial in progress."""
+        self.zi = None
+        self.active = False
+        self.hold_until = 0
+        self.events = 0
+
+    def envelope(self, frames):
+        """Envelope of the evaluated channels of (samples, channels) frames, continuing from the last call."""
+        rectified = np.abs(np.asarray(frames, dtype=np.float64)[:, self.channels])
+        if self.zi is None:
+            # Start in steady state at the first sample to avoid a spurious onset
+            self.zi = self.sos_zi[:, :, np.newaxis] * rectified[0][np.newaxis, np.newaxis, :]
+        envelope, self.zi = self._sosfilt(self.sos, rectified, axis=0, zi=self.zi)
+        return envelope
+
+    def process(self, frames, sample_index):
+        """
+        Evaluate (samples, channels) frames whose first sample has device index sample_index.
+        Returns a list of ('start' | 'stop', sample index) events in order.
+        """
+        if len(frames) == 0:
+            return []
+        envelope = self.envelope(frames)
+        can_start = (envelope >= self.on_thresholds).sum(axis=1) >= self.min_active_channels
+        can_continue = (envelope > self.off_thresholds).sum(axis=1) >= self.min_active_channels
+
+        events = []
+        position = max(0, self.hold_until - sample_index)
+        while position < len(frames):
+            candidates = np.flatnonzero(~can_continue[position:] if self.active else can_start[position:])
+            if not len(candidates):
+                break
+            event_position = position + int(candidates[0])
+            self.active = not self.active
+            events.append(('start' if self.active else 'stop', sample_index + event_position))
+            self.hold_until = sample_index + event_position + self.hold_off_samples
+            position = max(event_position + 1, self.hold_until - sample_index)
+        self.events += len(events)
+        return events
+
+
+def parse_message(packet):
+    """
+    Decode a MessageHandler packet into a dictionary with the MSG_HEADER fields
+    (serial_no, msg_type, timestamp) plus trial_number for TRIAL_START and
+    filename for START_RECORDING.
+    """
+    if len(packet) < MSG_HEADER.size:
+        raise ValueError(f"Message of {len(packet)} bytes is shorter than MSG_HEADER")
+    serial_no, msg_type, _, timestamp = MSG_HEADER.unpack_from(packet)
+    message = {'serial_no': serial_no, 'msg_type': msg_type, 'name': MESSAGE_NAMES.get(msg_type, str(msg_type)),
+               'timestamp': timestamp}
+    body = packet[MSG_HEADER.size:]
+    if msg_type == TRIAL_START and len(body) >= 4:
+        message['trial_number'] = struct.unpack_from('<i', body)[0]
+    elif msg_type == START_RECORDING:
+        message['filename'] = body[:MAX_STRING_LENGTH].split(b'\0', 1)[0].decode(errors='replace')
+    return message
+
+
+class MessageListener:
+    """
+    Receives MessageHandler messages on a UDP port in a background thread and
+    calls callback(message, received_time) for each one, where received_time is
+    the host monotonic time of arrival (for SampleClock.index_at).
+    """
+
+    def __init__(self, callback, port=10000, host='0.0.0.0', message_types=None):
+        """
+        Args:
+            callback: Called with (message dict, received monotonic time) on the listener thread.
+            port (int): UDP port the MessageHandler sends this module's messages to.
+            host (str): Interface to listen on.
+            message_types (set): Message types to pass on (default all).
+        """
+        self.callback = callback
+        self.port = port
+        self.host = host
+        self.message_types = message_types
+        self.sock = None
+        self.thread = None
+        self.running = False
+        self.messages_received = 0
+        self.errors = 0
+
+    def start(self):
+        """Bind the UDP port and start listening."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.settimeout(0.5)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"📨 Listening for trigger messages on UDP {self.host}:{self.port}")
+
+    def register(self, handler_host, handler_port, module_id, module_ip='127.0.0.1', subscribe_to=ALL_MODULES):
+        """
+        Register this listener as a module with a MessageHandler RPC server, so the
+        messages of subscribe_to are sent to it. Needs the msgpack-rpc client.
+        """
+        try:
+            import msgpackrpc
+        except ImportError:
+            raise RuntimeError("msgpack-rpc-python is required to register with the MessageHandler")
+        client = msgpackrpc.Client(msgpackrpc.Address(handler_host, handler_port))
+        try:
+            if not client.call('addModule', module_id, module_ip, self.port):
+                raise RuntimeError(f"MessageHandler refused module {module_id}")
+            if not client.call('subscribeTo', module_id, subscribe_to):
+                raise RuntimeError(f"MessageHandler could not subscribe module {module_id} to {subscribe_to}")
+        finally:
+            client.close()
+        print(f"✅ Registered with the MessageHandler at {handler_host}:{handler_port} as module {module_id}")
+
+    def _run(self):
+        """Receive loop."""
+        while self.running:
+            try:
+                packet, _ = self.sock.recvfrom(MAX_PACKET_LENGTH)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            received_time = time.monotonic()
+            try:
+                message = parse_message(packet)
+                if self.message_types is None or message['msg_type'] in self.message_types:
+                    self.messages_received += 1
+                    self.callback(message, received_time)
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Error handling trigger message: {e}")
+
+    def stop(self):
+        """Stop listening and close the socket."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def get_stats(self):
+        """Return a dictionary of listener counters."""
+        return {'messages_received': self.messages_received, 'errors': self.errors}
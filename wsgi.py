@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for production servers, e.g.
+
+    waitress-serve --threads=32 --port=5000 wsgi:app
+
+Configuration comes from EMG_CONFIG / EMG_* environment variables (see
+app.load_config). The acquisition handler and recording state live in this
+process, so run exactly one worker process (use threads for concurrency).
+"""
+import atexit
+from app import create_app, shutdown
+
+app = create_app()
+atexit.register(shutdown)